@@ -1,8 +1,9 @@
 import streamlit as st
-import asyncio
 import time
 
 import src.shopping_agent as shopping_agent
+from src.runtime import AgentRuntime
+from src.session_memory import SessionMemory
 
 st.set_page_config(
     page_title="Shopping Chat Assistant",
@@ -10,11 +11,29 @@ st.set_page_config(
     layout="wide"
 )
 
+# Status labels shown while the agent calls a tool
+TOOL_LABELS = {
+    'search_qdrant': "Searching products",
+    'search_qdrant_batch': "Running several product searches",
+    'get_product_details': "Looking up product details"
+}
+
+@st.cache_resource
+def get_agent_runtime():
+    """One background event loop per server process, shared by every session and message."""
+    return AgentRuntime.start()
+
+def iter_agent_stream(user_input, memory):
+    """Stream agent events from the shared runtime into Streamlit's synchronous script."""
+    return get_agent_runtime().stream(shopping_agent.run_agent_streamed(user_input, memory))
+
 # Initialize session state for chat history
 if 'chat_history' not in st.session_state:
     st.session_state.chat_history = []
 if 'is_processing' not in st.session_state:
     st.session_state.is_processing = False
+if 'memory' not in st.session_state:
+    st.session_state.memory = SessionMemory()
 
 # Header
 st.title("🛍️ AI Shopping Chat Assistant")
@@ -67,42 +86,42 @@ if user_input and not st.session_state.is_processing:
     with st.chat_message("user"):
         st.write(user_input)
     
-    # Show typing indicator and process
+    # Stream the answer as it is generated
     with st.chat_message("assistant"):
-        with st.spinner("Thinking..."):
-            try:
-                # Create conversation context by joining recent messages
-                conversation_context = ""
-                if len(st.session_state.chat_history) > 1:
-                    # Include last few messages for context
-                    recent_messages = st.session_state.chat_history[-3:]  # Last 3 messages
-                    for msg in recent_messages[:-1]:  # Exclude the current message
-                        if msg['role'] == 'user':
-                            conversation_context += f"User: {msg['content']}\n"
-                        else:
-                            conversation_context += f"Assistant: {msg['content']}\n"
-                    conversation_context += f"User: {user_input}"
-                else:
-                    conversation_context = user_input
-                
-                # Run the async function with context
-                result = asyncio.run(shopping_agent.run_agent(conversation_context))
-                
-                # Display assistant response
-                st.write(result)
-                
-                # Add assistant response to chat history
-                st.session_state.chat_history.append({
-                    'role': 'assistant', 
-                    'content': result
-                })
-            except Exception as e:
-                error_msg = f"An error occurred: {str(e)}"
-                st.error(error_msg)
-                st.session_state.chat_history.append({
-                    'role': 'assistant',
-                    'content': f"❌ {error_msg}"
-                })
+        status = st.status("Thinking...", expanded=False)
+        response_placeholder = st.empty()
+        try:
+            # Render text deltas and tool activity as they arrive; earlier turns come from the session memory
+            result = ""
+            for event in iter_agent_stream(user_input, st.session_state.memory):
+                if event.type == "text_delta":
+                    result += event.text
+                    response_placeholder.markdown(result + "▌")
+                elif event.type == "tool_call":
+                    label = TOOL_LABELS.get(event.tool_name, f"Calling {event.tool_name}")
+                    status.update(label=f"{label}...")
+                    status.write(f"🔧 {label}: `{event.text}`")
+                elif event.type == "done":
+                    # Text from earlier turns is replaced by the final answer
+                    result = event.text or result
+            
+            # Display assistant response
+            status.update(label="Done", state="complete")
+            response_placeholder.markdown(result)
+            
+            # Add assistant response to chat history
+            st.session_state.chat_history.append({
+                'role': 'assistant', 
+                'content': result
+            })
+        except Exception as e:
+            error_msg = f"An error occurred: {str(e)}"
+            status.update(label="Failed", state="error")
+            st.error(error_msg)
+            st.session_state.chat_history.append({
+                'role': 'assistant',
+                'content': f"❌ {error_msg}"
+            })
     
     # Reset processing state
     st.session_state.is_processing = False
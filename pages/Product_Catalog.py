@@ -1,20 +1,19 @@
 import streamlit as st
-import json
 
 st.title("👗 Product Catalog")
 st.write("Browse our collection of clothing products")
 
 import src.config as CONFIG
+from src.catalog import CatalogStore, paginate
 
-# Load data
-@st.cache_data
-def load_products():
+# Load data once per server process; the catalog and its indexes are shared across sessions
+@st.cache_resource
+def load_catalog():
     try:
-        with open(CONFIG.DATASET_PATH, 'r') as f:
-            return json.load(f)
+        return CatalogStore.load(CONFIG.DATASET_PATH)
     except Exception as e:
         st.error(f"Error loading products: {e}")
-        return []
+        return CatalogStore([])
 
 def display_product_card(product):
     """Display a single product in card format"""
@@ -40,11 +39,11 @@ def display_product_card(product):
 def main():
     # Check for single product view
     product_id = st.query_params.get('product_id')
-    products = load_products()
+    catalog = load_catalog()
     
     if product_id:
         # Single product view
-        product = next((p for p in products if p['id'] == int(product_id)), None)
+        product = catalog.get(int(product_id)) if product_id.isdigit() else None
         if product:
             if st.button("← Back to Catalog"):
                 del st.query_params.product_id
@@ -65,16 +64,22 @@ def main():
         search = st.text_input("🔍 Search:", placeholder="Product name or brand...")
         
         # Filter products
-        if search:
-            products = [p for p in products if 
-                       search.lower() in p['name'].lower() or 
-                       search.lower() in p['brand'].lower()]
+        products = catalog.search(search) if search else catalog.products
         
+        # Start from the first page whenever the search changes
+        if st.session_state.get('catalog_search') != search:
+            st.session_state.catalog_search = search
+            st.session_state.catalog_page = 1
+        
+        page_products, page_count = paginate(products, st.session_state.get('catalog_page', 1), CONFIG.CATALOG_PAGE_SIZE)
         st.write(f"**{len(products)} products**")
         
-        # Display products
-        for product in products:
+        # Display only the current page of products
+        for product in page_products:
             display_product_card(product)
+        
+        if page_count > 1:
+            st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, key='catalog_page')
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,350 @@
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import threading
+import logging
+from collections import OrderedDict
+
+import numpy as np
+
+import src.config as CONFIG
+
+logger = logging.getLogger(__name__)
+
+class LRUCache:
+    """Thread-safe in-memory cache that evicts the least recently used entry.
+
+    With `ttl` (seconds) set, entries also expire that long after they were stored.
+    """
+
+    def __init__(self, maxsize, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            value, expires_at = self._data[key]
+            if expires_at is not None and time.monotonic() > expires_at:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+def normalize_query(text):
+    """Lowercase and collapse whitespace so equivalent phrasings share a key."""
+    return " ".join(text.lower().split())
+
+class EmbeddingCache:
+    """Query embedding cache with an in-memory LRU tier and a SQLite tier on disk.
+
+    Both tiers are bounded. Disk rows record when they were last written or read from disk,
+    and once the table holds more than `disk_max_rows` the least recently used rows are trimmed.
+    """
+
+    def __init__(self, db_path, maxsize, disk_max_rows):
+        self.db_path = db_path
+        self.memory = LRUCache(maxsize)
+        self.disk_max_rows = disk_max_rows
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # With WAL, NORMAL only syncs at checkpoints; a lost cache write after a crash is harmless
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS query_embeddings ("
+            "query TEXT NOT NULL, model TEXT NOT NULL, dimensions INTEGER NOT NULL, "
+            "vector BLOB NOT NULL, last_used REAL NOT NULL, PRIMARY KEY (query, model, dimensions))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS query_embeddings_last_used ON query_embeddings (last_used)")
+        self._conn.commit()
+        # Upper bound on the row count (replaced rows are counted again), recounted before trimming
+        self._disk_rows = self._conn.execute("SELECT COUNT(*) FROM query_embeddings").fetchone()[0]
+        logger.info(f"Embedding cache opened at {db_path}")
+
+    @staticmethod
+    def _key(query, model, dimensions):
+        # Dimension 0 stands for the model's native size
+        return (normalize_query(query), model, dimensions or 0)
+
+    def _get_memory(self, key):
+        vector = self.memory.get(key)
+        if vector is None:
+            return None
+        with self._lock:
+            self.memory_hits += 1
+        return vector.tolist()
+
+    def get(self, query, model, dimensions=None):
+        """Return the cached embedding as a list of floats, or None on a miss."""
+        key = self._key(query, model, dimensions)
+
+        vector = self._get_memory(key)
+        if vector is not None:
+            return vector
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT vector FROM query_embeddings WHERE query = ? AND model = ? AND dimensions = ?",
+                key
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._conn.execute(
+                "UPDATE query_embeddings SET last_used = ? WHERE query = ? AND model = ? AND dimensions = ?",
+                (time.time(), *key)
+            )
+            self._conn.commit()
+
+        vector = np.frombuffer(row[0], dtype=np.float32)
+        self.memory.put(key, vector)
+        return vector.tolist()
+
+    def put(self, query, model, vector, dimensions=None):
+        """Store an embedding in both tiers."""
+        self.put_many([(query, vector)], model, dimensions)
+
+    def _put_memory(self, items, model, dimensions):
+        rows = []
+        for query, vector in items:
+            key = self._key(query, model, dimensions)
+            vector = np.asarray(vector, dtype=np.float32)
+            self.memory.put(key, vector)
+            rows.append((*key, vector.tobytes(), time.time()))
+        return rows
+
+    def _trim_disk(self):
+        # Trim to 90% of the cap so the next few inserts do not trigger another delete
+        self._disk_rows = self._conn.execute("SELECT COUNT(*) FROM query_embeddings").fetchone()[0]
+        excess = self._disk_rows - int(self.disk_max_rows * 0.9)
+        if self._disk_rows > self.disk_max_rows and excess > 0:
+            self._conn.execute(
+                "DELETE FROM query_embeddings WHERE rowid IN "
+                "(SELECT rowid FROM query_embeddings ORDER BY last_used LIMIT ?)",
+                (excess,)
+            )
+            self._disk_rows -= excess
+            logger.info(f"Embedding cache trimmed {excess} least recently used rows from disk")
+
+    def _put_disk(self, rows):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO query_embeddings (query, model, dimensions, vector, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self._disk_rows += len(rows)
+            if self._disk_rows > self.disk_max_rows:
+                self._trim_disk()
+            self._conn.commit()
+
+    def put_many(self, items, model, dimensions=None):
+        """Store (query, vector) pairs in both tiers with one disk transaction."""
+        self._put_disk(self._put_memory(items, model, dimensions))
+
+    async def get_many_async(self, queries, model, dimensions=None):
+        """Look up several queries; SQLite reads run in a worker thread so the event loop never waits on disk."""
+        vectors = [self._get_memory(self._key(query, model, dimensions)) for query in queries]
+        misses = [idx for idx, vector in enumerate(vectors) if vector is None]
+        if misses:
+            found = await asyncio.to_thread(
+                lambda: [self.get(queries[idx], model, dimensions) for idx in misses]
+            )
+            for idx, vector in zip(misses, found):
+                vectors[idx] = vector
+        return vectors
+
+    async def put_many_async(self, items, model, dimensions=None):
+        """put_many with the SQLite write and commit run in a worker thread."""
+        rows = self._put_memory(items, model, dimensions)
+        await asyncio.to_thread(self._put_disk, rows)
+
+    def stats(self):
+        """Hit/miss counters for monitoring."""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        hits = self.memory_hits + self.disk_hits
+        return {
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'memory_entries': len(self.memory)
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+_embedding_cache = None
+_embedding_cache_lock = threading.Lock()
+
+def get_embedding_cache():
+    """Return the process-wide query embedding cache, opening it on first use."""
+    global _embedding_cache
+    if _embedding_cache is None:
+        with _embedding_cache_lock:
+            if _embedding_cache is None:
+                _embedding_cache = EmbeddingCache(CONFIG.EMBEDDING_CACHE_DB, CONFIG.EMBEDDING_CACHE_SIZE,
+                                                  CONFIG.EMBEDDING_CACHE_DISK_MAX_ROWS)
+    return _embedding_cache
+
+def write_catalog_version(collection_name):
+    """Record a new catalog version; called by ingestion after the collection changes."""
+    version = {
+        'version': f"{collection_name}@{time.time():.6f}",
+        'collection': collection_name,
+        'updated_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+    path = CONFIG.CATALOG_VERSION_FILE
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(version, f)
+    os.replace(tmp_path, path)
+    logger.info(f"Catalog version is now {version['version']}")
+    return version['version']
+
+# (mtime, version) of the catalog version file, re-read only when the file changes
+_catalog_version = (None, None)
+
+def catalog_version():
+    """Current catalog version written by ingestion, or None if it never ran."""
+    global _catalog_version
+    try:
+        mtime = os.stat(CONFIG.CATALOG_VERSION_FILE).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    if mtime != _catalog_version[0]:
+        try:
+            with open(CONFIG.CATALOG_VERSION_FILE, 'r') as f:
+                _catalog_version = (mtime, json.load(f)['version'])
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Could not read catalog version: {e}")
+            return _catalog_version[1]
+    return _catalog_version[1]
+
+class VersionedCache:
+    """LRU + TTL cache whose entries are dropped when the catalog version changes."""
+
+    def __init__(self, maxsize, ttl, name="cache"):
+        self.entries = LRUCache(maxsize, ttl)
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _check_version(self):
+        version = catalog_version()
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    if self._version is not None:
+                        logger.info(f"Catalog version changed to {version}, clearing {self.name}")
+                    self.entries.clear()
+                    self._version = version
+        return version
+
+    def get(self, key):
+        """Return the cached value for `key`, or None on a miss."""
+        version = self._check_version()
+        value = self.entries.get((version, key))
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def put(self, key, value):
+        version = self._check_version()
+        self.entries.put((version, key), value)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self.entries)
+        }
+
+class SearchResultCache(VersionedCache):
+    """Cache of processed search results keyed on the full normalized request."""
+
+    def __init__(self, maxsize, ttl):
+        super().__init__(maxsize, ttl, name="search result cache")
+
+    def key(self, backend_name, query, filters, top_k, score_threshold, fields=None):
+        """Normalized request key; equivalent filter dicts produce the same key."""
+        return (
+            backend_name,
+            normalize_query(query),
+            json.dumps(filters or {}, sort_keys=True),
+            top_k,
+            score_threshold,
+            tuple(fields) if fields else None,
+            CONFIG.HYBRID_SEARCH
+        )
+
+    def get(self, key):
+        """Return the cached results for `key` as a new list, or None on a miss.
+
+        The result objects themselves are shared between hits and must not be modified.
+        """
+        results = super().get(key)
+        return None if results is None else list(results)
+
+    def put(self, key, results):
+        super().put(key, tuple(results))
+
+_search_result_cache = None
+_search_result_cache_lock = threading.Lock()
+
+def get_search_result_cache():
+    """Return the process-wide search result cache."""
+    global _search_result_cache
+    if _search_result_cache is None:
+        with _search_result_cache_lock:
+            if _search_result_cache is None:
+                _search_result_cache = SearchResultCache(CONFIG.SEARCH_RESULT_CACHE_SIZE, CONFIG.SEARCH_RESULT_CACHE_TTL)
+    return _search_result_cache
+
+_product_cache = None
+_product_cache_lock = threading.Lock()
+
+def get_product_cache():
+    """Return the process-wide cache of product details looked up by ID."""
+    global _product_cache
+    if _product_cache is None:
+        with _product_cache_lock:
+            if _product_cache is None:
+                _product_cache = VersionedCache(CONFIG.PRODUCT_CACHE_SIZE, CONFIG.PRODUCT_CACHE_TTL, name="product cache")
+    return _product_cache
@@ -0,0 +1,97 @@
+import re
+import json
+import bisect
+import logging
+from array import array
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Words and numbers; "&" joins words so "H&M" stays one token
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:&[a-z0-9]+)*")
+
+# Query words shorter than this match whole words only, not every word they start
+MIN_PREFIX_LENGTH = 2
+
+def tokenize(text):
+    """Lowercase word tokens; apostrophes are dropped so "Levi's" and "levis" match."""
+    return _TOKEN_PATTERN.findall(text.lower().replace("'", ""))
+
+class CatalogStore:
+    """In-memory product catalog with an ID index and a name/brand token index.
+
+    Tokens are kept in one sorted vocabulary, each with a sorted int32 array of the positions
+    of products containing it. The words starting with a prefix form one contiguous slice of
+    the vocabulary, found with bisect, so no per-prefix entries are stored.
+    """
+
+    def __init__(self, products):
+        self.products = products
+        self.by_id = {product['id']: product for product in products}
+
+        token_numbers = {}
+        pair_tokens = array('i')
+        pair_positions = array('i')
+        for position, product in enumerate(products):
+            for token in set(tokenize(f"{product['name']} {product['brand']}")):
+                pair_tokens.append(token_numbers.setdefault(token, len(token_numbers)))
+                pair_positions.append(position)
+
+        # Renumber tokens in sorted order, then group positions by token
+        self._vocabulary = sorted(token_numbers)
+        ranks = np.empty(len(token_numbers), dtype=np.int32)
+        ranks[[token_numbers[token] for token in self._vocabulary]] = np.arange(len(token_numbers), dtype=np.int32)
+        token_ranks = ranks[np.frombuffer(pair_tokens, dtype=np.int32)]
+        positions = np.frombuffer(pair_positions, dtype=np.int32)
+        order = np.lexsort((positions, token_ranks))
+        self._positions = positions[order]
+        self._offsets = np.searchsorted(token_ranks[order], np.arange(len(self._vocabulary) + 1))
+        logger.info(f"Catalog indexed: {len(products)} products, {len(self._vocabulary)} tokens")
+
+    @classmethod
+    def load(cls, dataset_path):
+        with open(dataset_path, 'r') as f:
+            return cls(json.load(f))
+
+    def __len__(self):
+        return len(self.products)
+
+    def get(self, product_id):
+        """Product with the given ID, or None."""
+        return self.by_id.get(product_id)
+
+    def _token_positions(self, query_token):
+        """Sorted positions of products with a word starting with `query_token`."""
+        start = bisect.bisect_left(self._vocabulary, query_token)
+        if len(query_token) < MIN_PREFIX_LENGTH:
+            end = start + (start < len(self._vocabulary) and self._vocabulary[start] == query_token)
+        else:
+            end = bisect.bisect_left(self._vocabulary, query_token + "\uffff", lo=start)
+        matches = self._positions[self._offsets[start]:self._offsets[end]]
+        # A single word's positions are already sorted and unique
+        return matches if end - start == 1 else np.unique(matches)
+
+    def search(self, text):
+        """Products whose name or brand has a word starting with every query word, in catalog order.
+
+        Query words shorter than MIN_PREFIX_LENGTH must match a whole word.
+        """
+        query_tokens = tokenize(text)
+        if not query_tokens:
+            return self.products
+
+        positions = None
+        for query_token in sorted(query_tokens, key=len, reverse=True):
+            matches = self._token_positions(query_token)
+            positions = matches if positions is None else np.intersect1d(positions, matches, assume_unique=True)
+            if not len(positions):
+                return []
+        return [self.products[position] for position in positions.tolist()]
+
+def paginate(items, page, page_size):
+    """Items on a 1-based page, with the total number of pages."""
+    page_count = max(1, -(-len(items) // page_size))
+    page = min(max(page, 1), page_count)
+    start = (page - 1) * page_size
+    return items[start:start + page_size], page_count
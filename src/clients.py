@@ -0,0 +1,148 @@
+import atexit
+import asyncio
+import threading
+import weakref
+import logging
+
+import httpx
+import openai
+from qdrant_client import QdrantClient, AsyncQdrantClient
+
+import src.config as CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Process-wide client registry: one client (and keep-alive pool) per endpoint
+_lock = threading.Lock()
+_qdrant_clients = {}
+_openai_clients = {}
+
+# Async clients hold connections bound to an event loop, so they are pooled per loop
+_async_clients = weakref.WeakKeyDictionary()
+
+def _http_limits():
+    """Connection pool limits shared by every pooled HTTP client."""
+    return httpx.Limits(
+        max_connections=CONFIG.HTTP_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=CONFIG.HTTP_POOL_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=CONFIG.HTTP_POOL_KEEPALIVE_EXPIRY
+    )
+
+def get_qdrant_client(url=None):
+    """Return the shared Qdrant client for `url`, creating it on first use."""
+    url = url or CONFIG.QDRANT_URL
+    client = _qdrant_clients.get(url)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _qdrant_clients.get(url)
+        if client is None:
+            logger.info(f"Creating pooled Qdrant client for {url} (gRPC: {CONFIG.QDRANT_PREFER_GRPC})")
+            if CONFIG.QDRANT_PREFER_GRPC:
+                client = QdrantClient(
+                    url=url,
+                    timeout=CONFIG.QDRANT_TIMEOUT,
+                    prefer_grpc=True,
+                    grpc_port=CONFIG.QDRANT_GRPC_PORT,
+                    pool_size=CONFIG.HTTP_POOL_MAX_CONNECTIONS
+                )
+            else:
+                # Explicit limits keep connections alive, even for localhost
+                client = QdrantClient(
+                    url=url,
+                    timeout=CONFIG.QDRANT_TIMEOUT,
+                    limits=_http_limits()
+                )
+            _qdrant_clients[url] = client
+    return client
+
+def get_openai_client(api_key=None):
+    """Return the shared OpenAI client for `api_key`, creating it on first use."""
+    api_key = api_key or CONFIG.OPENAI_API_KEY
+    client = _openai_clients.get(api_key)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _openai_clients.get(api_key)
+        if client is None:
+            logger.info("Creating pooled OpenAI client")
+            client = openai.Client(
+                api_key=api_key,
+                timeout=CONFIG.OPENAI_TIMEOUT,
+                http_client=openai.DefaultHttpxClient(limits=_http_limits())
+            )
+            _openai_clients[api_key] = client
+    return client
+
+def _loop_clients():
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = _async_clients.get(loop)
+        if clients is None:
+            clients = {}
+            _async_clients[loop] = clients
+    return clients
+
+def get_async_qdrant_client(url=None):
+    """Return the async Qdrant client for `url` on the running event loop."""
+    url = url or CONFIG.QDRANT_URL
+    clients = _loop_clients()
+    key = ('qdrant', url)
+    client = clients.get(key)
+    if client is None:
+        logger.info(f"Creating pooled async Qdrant client for {url} (gRPC: {CONFIG.QDRANT_PREFER_GRPC})")
+        if CONFIG.QDRANT_PREFER_GRPC:
+            client = AsyncQdrantClient(
+                url=url,
+                timeout=CONFIG.QDRANT_TIMEOUT,
+                prefer_grpc=True,
+                grpc_port=CONFIG.QDRANT_GRPC_PORT,
+                pool_size=CONFIG.HTTP_POOL_MAX_CONNECTIONS
+            )
+        else:
+            client = AsyncQdrantClient(
+                url=url,
+                timeout=CONFIG.QDRANT_TIMEOUT,
+                limits=_http_limits()
+            )
+        clients[key] = client
+    return client
+
+def get_async_openai_client(api_key=None):
+    """Return the async OpenAI client for `api_key` on the running event loop."""
+    api_key = api_key or CONFIG.OPENAI_API_KEY
+    clients = _loop_clients()
+    key = ('openai', api_key)
+    client = clients.get(key)
+    if client is None:
+        logger.info("Creating pooled async OpenAI client")
+        client = openai.AsyncOpenAI(
+            api_key=api_key,
+            timeout=CONFIG.OPENAI_TIMEOUT,
+            http_client=openai.DefaultAsyncHttpxClient(limits=_http_limits())
+        )
+        clients[key] = client
+    return client
+
+async def close_async_clients():
+    """Close the async clients pooled on the running event loop."""
+    clients = _loop_clients()
+    for client in clients.values():
+        await client.close()
+    clients.clear()
+
+def close_clients():
+    """Close every pooled client and clear the registry."""
+    with _lock:
+        for client in _qdrant_clients.values():
+            client.close()
+        for client in _openai_clients.values():
+            client.close()
+        _qdrant_clients.clear()
+        _openai_clients.clear()
+    logger.info("Closed all pooled clients")
+
+# Release pooled connections when the process exits (scripts, the Streamlit server)
+atexit.register(close_clients)
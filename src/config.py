@@ -12,13 +12,120 @@ if not OPENAI_API_KEY:
 # Qdrant Configuration
 QDRANT_URL = "http://localhost:6333"
 QDRANT_COLLECTION_NAME = "product_catalog"
+QDRANT_TIMEOUT = 60  # seconds
+QDRANT_PREFER_GRPC = False  # Use gRPC transport instead of REST
+QDRANT_GRPC_PORT = 6334
+
+# Collection Tuning
+QDRANT_HNSW_M = 16  # Graph links per node; higher improves recall at the cost of memory
+QDRANT_HNSW_EF_CONSTRUCT = 100  # Candidate list size while building the index
+QDRANT_VECTORS_ON_DISK = False  # Keep original vectors on disk (memmap) instead of RAM
+QDRANT_HNSW_ON_DISK = False  # Keep the HNSW graph on disk instead of RAM
+QDRANT_INDEXING_THRESHOLD = 20000  # KB of vectors per segment before an HNSW index is built
+QDRANT_DEFAULT_SEGMENT_NUMBER = 0  # 0 lets Qdrant pick based on CPU count
+
+# Vector Quantization
+QDRANT_QUANTIZATION = None  # None, "scalar" (int8, ~4x less RAM) or "binary" (~32x less RAM)
+QDRANT_QUANTIZATION_ALWAYS_RAM = True  # Keep quantized vectors in RAM even when originals are on disk
+QDRANT_SCALAR_QUANTILE = 0.99  # Outlier cut-off used to calibrate int8 scalar quantization
+
+# Hybrid Search
+HYBRID_SEARCH = True  # Store a BM25 sparse vector next to the dense one and fuse both rankings with RRF
+SPARSE_VECTOR_NAME = "bm25"
+BM25_K1 = 1.2  # Term-frequency saturation
+BM25_B = 0.75  # Document length normalization strength
+BM25_AVG_DOC_LENGTH = 35  # Typical token count of a product's sparse text
+HYBRID_PREFETCH_LIMIT = 50  # Candidates taken from each of the dense and sparse searches before fusion
+HYBRID_SPARSE_MIN_SCORE = 0.5  # Minimum BM25 score of a keyword candidate; about one match on a term not in most products
+
+# Search Backend
+# "qdrant" queries the Qdrant collection, "local" searches the embedding store in-process,
+# "auto" uses Qdrant and falls back to local search when Qdrant is unreachable
+SEARCH_BACKEND = "auto"
+SEARCH_FALLBACK_COOLDOWN = 30  # Seconds "auto" serves local search after a Qdrant failure before trying Qdrant again
+LOCAL_SEARCH_IVF_MIN_ROWS = 100000  # Below this, local search is exact brute force
+LOCAL_SEARCH_IVF_LISTS = None  # IVF clusters; None picks ~4 * sqrt(rows)
+LOCAL_SEARCH_IVF_NPROBE = 16  # Clusters scanned per query
+
+# Search-time Parameters
+COLLECTION_INFO_TTL = 60  # Seconds a checked collection vector size is trusted
+QDRANT_SEARCH_HNSW_EF = None  # None uses the collection default
+QDRANT_SEARCH_RESCORE = True  # Re-rank quantized candidates with the original vectors
+QDRANT_SEARCH_OVERSAMPLING = 2.0  # Fetch top_k * oversampling quantized candidates before rescoring
+
+# Payload fields indexed for filtered search (field name -> schema type)
+QDRANT_PAYLOAD_INDEXES = {
+    "brand": "keyword",
+    "category": "keyword",
+    "color": "keyword",
+    "size": "keyword",
+    "price": "float"
+}
+
+# Ingestion Configuration
+# "blue_green" builds a versioned collection and swaps the QDRANT_COLLECTION_NAME alias to it;
+# "recreate" deletes and rebuilds QDRANT_COLLECTION_NAME in place (search is down meanwhile)
+INGEST_MODE = "blue_green"
+INGEST_KEEP_VERSIONS = 1  # Previous collection versions kept for rollback
+INGEST_GREEN_TIMEOUT = 600  # Seconds to wait for indexing to finish before swapping
+INGEST_BATCH_SIZE = 256  # Points per upload request
+INGEST_PARALLEL = 4  # Parallel upload workers
+INGEST_MAX_RETRIES = 3  # Retries per failed batch
+
+# Shared HTTP Connection Pool Configuration
+HTTP_POOL_MAX_CONNECTIONS = 20
+HTTP_POOL_MAX_KEEPALIVE_CONNECTIONS = 20
+HTTP_POOL_KEEPALIVE_EXPIRY = 30.0  # seconds
+OPENAI_TIMEOUT = 30.0  # seconds
 
 # File Paths
 DATASET_PATH = "dataset/product_catalog.json"
-EMBEDDING_FILE = "embeddings/product_catalog.npy"
+CATALOG_PAGE_SIZE = 20  # Products per page on the Product Catalog page
+EMBEDDING_FILE = "embeddings/product_catalog.emb"  # Memory-mapped embedding store (see src/embedding_store.py)
+EMBEDDING_STORE_DTYPE = "float16"  # "float16" halves the file size again compared to "float32"
 
 # Embedding Model Configuration
 EMBEDDING_MODEL = "text-embedding-3-small"
+# Reduced (Matryoshka) embedding size, e.g. 256 or 512; None keeps the model's native 1536.
+# Used at embed, collection creation and query time, so changing it requires re-embedding and re-ingesting.
+EMBEDDING_DIMENSIONS = None
+
+# Embedding Pipeline Configuration
+EMBEDDING_BATCH_MAX_TOKENS = 250000  # Per request; the API caps a request at 300k tokens
+EMBEDDING_BATCH_MAX_INPUTS = 2048  # Per request; API limit
+EMBEDDING_MAX_CONCURRENCY = 4  # Batches in flight at once
+EMBEDDING_MAX_RETRIES = 6  # Retries per batch on rate limits and transient errors
+EMBEDDING_CHECKPOINT_DIR = "embeddings/checkpoints"
+
+# Query Embedding Cache Configuration
+EMBEDDING_CACHE_SIZE = 10000  # Entries kept in the in-memory LRU tier
+EMBEDDING_CACHE_DB = "embeddings/query_embedding_cache.sqlite"
+EMBEDDING_CACHE_DISK_MAX_ROWS = 50000  # Rows kept on disk (about 6 KB each at 1536 dimensions); oldest used are trimmed
+
+# Fields returned to the agent by default; full descriptions are fetched only on request
+AGENT_RESULT_FIELDS = ["name", "brand", "category", "price", "color", "material", "size", "url"]
+
+# Fast Path for Simple Filter Queries
+FAST_PATH_ENABLED = True  # Answer confidently parsed brand/category/price queries without the LLM
+FAST_PATH_MIN_CONFIDENCE = 0.75  # Parser confidence needed to skip the agent
+FAST_PATH_MAX_EXTRA_WORDS = 6  # Words besides the filters before a request counts as complex
+FAST_PATH_TOP_K = 5
+
+# Agent Tool Execution
+TOOL_MAX_CONCURRENCY = 4  # Tool calls executed at the same time within one agent run
+
+# Chat Session Memory
+SESSION_MEMORY_MAX_TOKENS = 2000  # Budget for earlier turns sent with each new message
+SESSION_MEMORY_REPLY_MAX_TOKENS = 300  # Earlier assistant replies are cut to this length
+
+# Search Result Cache
+SEARCH_RESULT_CACHE_SIZE = 1000  # Distinct (query, filters, top_k, threshold) requests kept
+SEARCH_RESULT_CACHE_TTL = 300  # Seconds a cached result list is served
+CATALOG_VERSION_FILE = "embeddings/catalog_version.json"  # Bumped by ingest_embeddings.py; a change clears the caches
+
+# Product Detail Cache
+PRODUCT_CACHE_SIZE = 5000  # Products kept for lookups by ID
+PRODUCT_CACHE_TTL = 600  # Seconds a looked-up product is served from memory
 
 # Dataset Categories and Brands
 PRODUCT_CATEGORIES = [
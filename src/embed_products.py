@@ -1,6 +1,5 @@
 import pandas as pd
 import numpy as np
-import openai
 import sys
 import os
 import logging
@@ -9,12 +8,17 @@ from datetime import datetime
 # Add parent directory to path to import config
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import src.config as CONFIG
+from src.clients import get_openai_client
+from src.embedding_pipeline import iter_embedded_batches, clear_checkpoints, build_product_text, content_hash
+from src.embedding_store import EmbeddingStore
 
 openai_api_key = CONFIG.OPENAI_API_KEY
 embedding_model = CONFIG.EMBEDDING_MODEL
+embedding_dimensions = CONFIG.EMBEDDING_DIMENSIONS
 embed_products_log_file = CONFIG.EMBED_PRODUCTS_LOG_FILE
 dataset_path = CONFIG.DATASET_PATH
 embedding_file_path = CONFIG.EMBEDDING_FILE
+embedding_dtype = CONFIG.EMBEDDING_STORE_DTYPE
 
 # Create logs directory if it doesn't exist (BEFORE setting up logging)
 os.makedirs('logs', exist_ok=True)
@@ -45,7 +49,7 @@ except Exception as e:
 # Initialize OpenAI client with API key from environment
 logger.info("Initializing OpenAI client")
 try:
-    openai_client = openai.Client(api_key=openai_api_key)
+    openai_client = get_openai_client(openai_api_key)
     logger.info("OpenAI client initialized successfully")
 except Exception as e:
     logger.error(f"Failed to initialize OpenAI client: {str(e)}")
@@ -54,65 +58,101 @@ except Exception as e:
 # Prepare text descriptions
 logger.info("Preparing text descriptions for embedding generation")
 try:
-    texts = [f"{row.name}. {row.description} Material: {row.material}. Color: {row.color}." for row in df.itertuples()]
+    products = df.to_dict('records')
+    product_ids = [int(product['id']) for product in products]
+    texts = [build_product_text(product) for product in products]
+    content_hashes = [content_hash(text) for text in texts]
     logger.info(f"Prepared {len(texts)} text descriptions")
     logger.debug(f"Sample text: {texts[0][:100]}...")
 except Exception as e:
     logger.error(f"Failed to prepare text descriptions: {str(e)}")
     sys.exit(1)
 
-# Generate embeddings using OpenAI
-logger.info(f"Starting embedding generation using model: {embedding_model}")
-logger.info(f"Processing {len(texts)} texts in batch")
-
+# Find vectors from the previous run that can be reused
+logger.info("Comparing content hashes against the previous embedding run")
+previous_store = None
+previous_rows = {}
 try:
-    start_time = datetime.now()
-    response = openai_client.embeddings.create(input=texts, model=embedding_model)
-    end_time = datetime.now()
-    duration = (end_time - start_time).total_seconds()
-    
-    logger.info(f"Successfully generated {len(response.data)} embeddings")
-    logger.info(f"Embedding dimension: {len(response.data[0].embedding)}")
-    logger.info(f"Generation took {duration:.2f} seconds")
-    logger.info(f"Average time per embedding: {duration/len(response.data):.3f} seconds")
-    
+    if os.path.exists(embedding_file_path):
+        previous_store = EmbeddingStore.open(embedding_file_path)
+        if previous_store.model != embedding_model or previous_store.dimensions != embedding_dimensions:
+            logger.warning(f"Previous embeddings used model '{previous_store.model}' with "
+                           f"{previous_store.dimensions or 'native'} dimensions, re-embedding everything")
+            previous_store = None
+        else:
+            previous_rows = {h: row for row, h in enumerate(previous_store.content_hashes.astype(str).tolist())}
+    else:
+        logger.info("No previous embeddings found, embedding all products")
 except Exception as e:
-    logger.error(f"Failed to generate embeddings: {str(e)}")
-    sys.exit(1)
+    logger.warning(f"Could not read previous embeddings, re-embedding everything: {str(e)}")
+    previous_store = None
+    previous_rows = {}
 
-# Extract only the embedding vectors (not the full response objects)
-logger.info("Extracting embedding vectors from API response")
-try:
-    embeddings = [item.embedding for item in response.data]
-    vectors = np.array(embeddings)
-    logger.info(f"Created numpy array with shape: {vectors.shape}")
-    logger.info(f"Array memory usage: {vectors.nbytes / (1024*1024):.2f} MB")
-except Exception as e:
-    logger.error(f"Failed to extract embeddings: {str(e)}")
-    sys.exit(1)
+reuse_rows = [previous_rows.get(h) for h in content_hashes]
+reused_indices = [idx for idx, row in enumerate(reuse_rows) if row is not None]
+changed_indices = [idx for idx, row in enumerate(reuse_rows) if row is None]
+dropped_count = len(previous_rows) - len(set(row for row in reuse_rows if row is not None))
+logger.info(f"Unchanged products: {len(reused_indices)}, new or changed: {len(changed_indices)}, "
+            f"dropped: {dropped_count}")
 
-# Save embeddings using config path
-logger.info(f"Saving embeddings to: {embedding_file_path}")
+if (previous_store is not None and not changed_indices and reuse_rows == list(range(len(previous_store)))
+        and np.array_equal(previous_store.product_ids, product_ids) and previous_store.header['dtype'] == embedding_dtype):
+    logger.info("Embeddings are already up to date, nothing to do")
+    sys.exit(0)
+
+# Generate embeddings for new and changed products using the chunked, resumable pipeline
+logger.info(f"Starting embedding generation using model: {embedding_model} "
+            f"({embedding_dimensions or 'native'} dimensions)")
+logger.info(f"Processing {len(changed_indices)} texts in token-budgeted batches")
 
 try:
-    # Create directory if it doesn't exist
-    os.makedirs(os.path.dirname(embedding_file_path), exist_ok=True)
-    
-    # Save the embeddings
+    # Stream rows straight into a memory-mapped embedding store
     start_time = datetime.now()
-    np.save(embedding_file_path, vectors, allow_pickle=False)
-    end_time = datetime.now()
-    save_duration = (end_time - start_time).total_seconds()
+    tmp_file_path = embedding_file_path + ".partial"
+    store = None
+
+    def open_output(dimension):
+        logger.info(f"Embedding dimension: {dimension}, stored as {embedding_dtype}")
+        return EmbeddingStore.create(
+            tmp_file_path, model=embedding_model, dimension=dimension, product_ids=product_ids,
+            content_hashes=content_hashes, dimensions=embedding_dimensions, dtype=embedding_dtype
+        )
+
+    if reused_indices:
+        store = open_output(previous_store.dimension)
+        for chunk_start in range(0, len(reused_indices), 10000):
+            chunk = reused_indices[chunk_start:chunk_start + 10000]
+            store.vectors[chunk] = previous_store.vectors[[reuse_rows[idx] for idx in chunk]]
+        logger.info(f"Reused {len(reused_indices)} vectors from the previous run")
+
+    changed_texts = [texts[idx] for idx in changed_indices]
+    for batch_start, batch_end, batch_vectors in iter_embedded_batches(openai_client, changed_texts, model=embedding_model):
+        if store is None:
+            store = open_output(batch_vectors.shape[1])
+        store.vectors[changed_indices[batch_start:batch_end]] = batch_vectors
+    store.close()
+    if previous_store is not None:
+        previous_store.close()
+    os.replace(tmp_file_path, embedding_file_path)
+    duration = (datetime.now() - start_time).total_seconds()
+    
+    store = EmbeddingStore.open(embedding_file_path)
+    logger.info(f"Successfully generated {len(changed_indices)} embeddings")
+    logger.info(f"Generation took {duration:.2f} seconds")
+    if changed_indices:
+        logger.info(f"Average time per embedding: {duration/len(changed_indices):.3f} seconds")
     
     # Verify file was created and get size
     file_size = os.path.getsize(embedding_file_path) / (1024*1024)  # MB
-    
-    logger.info(f"Successfully saved embeddings to disk")
+    logger.info(f"Successfully saved embeddings to: {embedding_file_path}")
     logger.info(f"File size: {file_size:.2f} MB")
-    logger.info(f"Save operation took {save_duration:.3f} seconds")
+    
+    # The output file is complete, so the batch checkpoints are no longer needed
+    clear_checkpoints()
     
 except Exception as e:
-    logger.error(f"Failed to save embeddings: {str(e)}")
+    logger.error(f"Failed to generate embeddings: {str(e)}")
+    logger.error("Completed batches are checkpointed; re-run to resume")
     sys.exit(1)
 
 # Final summary
@@ -120,10 +160,12 @@ logger.info("=" * 50)
 logger.info("EMBEDDING GENERATION SUMMARY")
 logger.info("=" * 50)
 logger.info(f"Dataset: {dataset_path}")
-logger.info(f"Products processed: {len(df)}")
+logger.info(f"Products in catalog: {len(df)}")
+logger.info(f"Products re-embedded: {len(changed_indices)}")
+logger.info(f"Vectors reused: {len(reused_indices)}")
 logger.info(f"Embedding model: {embedding_model}")
-logger.info(f"Embedding dimension: {vectors.shape[1]}")
-logger.info(f"Output file: {embedding_file_path}.npy")
+logger.info(f"Embedding dimension: {store.dimension} ({store.header['dtype']})")
+logger.info(f"Output file: {embedding_file_path}")
 logger.info(f"File size: {file_size:.2f} MB")
 logger.info("Embedding generation completed successfully!")
 logger.info("=" * 50)
\ No newline at end of file
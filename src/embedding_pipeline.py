@@ -0,0 +1,159 @@
+import os
+import time
+import random
+import json
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+import openai
+
+import src.config as CONFIG
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except ImportError:
+    _encoding = None
+
+# Errors worth retrying with backoff; anything else fails the batch immediately
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError
+)
+
+def count_tokens(text):
+    """Token count for budgeting batches; a conservative estimate when tiktoken is missing."""
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return len(text) // 3 + 1
+
+def embedding_request_options():
+    """Extra embeddings.create arguments, e.g. a reduced output dimension."""
+    if CONFIG.EMBEDDING_DIMENSIONS:
+        return {'dimensions': CONFIG.EMBEDDING_DIMENSIONS}
+    return {}
+
+def build_product_text(product):
+    """Text that is embedded for a product; its hash decides whether a product needs re-embedding."""
+    return f"{product['name']}. {product['description']} Material: {product['material']}. Color: {product['color']}."
+
+def content_hash(text):
+    """Stable fingerprint of the embedded text."""
+    return hashlib.sha256(text.encode()).hexdigest()[:32]
+
+def make_batches(texts, max_tokens=None, max_inputs=None):
+    """Split texts into contiguous (start, end) ranges that fit the per-request limits."""
+    max_tokens = max_tokens or CONFIG.EMBEDDING_BATCH_MAX_TOKENS
+    max_inputs = max_inputs or CONFIG.EMBEDDING_BATCH_MAX_INPUTS
+
+    batches = []
+    start = 0
+    batch_tokens = 0
+    for idx, text in enumerate(texts):
+        tokens = count_tokens(text)
+        if idx > start and (batch_tokens + tokens > max_tokens or idx - start >= max_inputs):
+            batches.append((start, idx))
+            start = idx
+            batch_tokens = 0
+        batch_tokens += tokens
+    if start < len(texts):
+        batches.append((start, len(texts)))
+    return batches
+
+def _checkpoint_path(checkpoint_dir, texts, start, end, model):
+    # The digest ties a checkpoint to its exact inputs and output size, so stale files are never reused
+    digest = hashlib.sha1()
+    digest.update(model.encode())
+    digest.update(json.dumps(embedding_request_options(), sort_keys=True).encode())
+    for text in texts[start:end]:
+        digest.update(text.encode())
+        digest.update(b"\0")
+    return os.path.join(checkpoint_dir, f"batch_{start:09d}_{end:09d}_{digest.hexdigest()[:16]}.npy")
+
+def embed_batch(openai_client, texts, model, max_retries=None):
+    """Embed one batch, retrying rate limits and transient errors with exponential backoff."""
+    max_retries = CONFIG.EMBEDDING_MAX_RETRIES if max_retries is None else max_retries
+    # Retries happen only in this loop; the SDK's own retries would multiply requests and backoff sleeps
+    openai_client = openai_client.with_options(max_retries=0)
+    for attempt in range(max_retries + 1):
+        try:
+            response = openai_client.embeddings.create(input=texts, model=model, **embedding_request_options())
+            return np.array([item.embedding for item in response.data], dtype=np.float32)
+        except RETRYABLE_ERRORS as e:
+            if attempt == max_retries:
+                raise
+            delay = min(60.0, 2 ** attempt) + random.uniform(0, 1)
+            logger.warning(f"Embedding batch failed ({type(e).__name__}), retrying in {delay:.1f}s "
+                           f"(attempt {attempt + 1}/{max_retries})")
+            time.sleep(delay)
+
+def _embed_with_checkpoint(openai_client, texts, start, end, model, checkpoint_path):
+    if os.path.exists(checkpoint_path):
+        logger.debug(f"Resuming batch {start}-{end} from checkpoint")
+        return np.load(checkpoint_path), True
+
+    vectors = embed_batch(openai_client, texts[start:end], model)
+    # Write then rename so a crash never leaves a truncated checkpoint behind
+    tmp_path = checkpoint_path + ".tmp.npy"
+    np.save(tmp_path, vectors, allow_pickle=False)
+    os.replace(tmp_path, checkpoint_path)
+    return vectors, False
+
+def iter_embedded_batches(openai_client, texts, model=None, checkpoint_dir=None, max_concurrency=None):
+    """Embed texts in token-budgeted batches, yielding (start, end, vectors) as batches finish.
+
+    Batches run concurrently (bounded by `max_concurrency`) and each finished batch is
+    checkpointed to disk, so an interrupted run resumes where it stopped.
+    """
+    model = model or CONFIG.EMBEDDING_MODEL
+    checkpoint_dir = checkpoint_dir or CONFIG.EMBEDDING_CHECKPOINT_DIR
+    max_concurrency = max_concurrency or CONFIG.EMBEDDING_MAX_CONCURRENCY
+    os.makedirs(checkpoint_dir, exist_ok=True)
+
+    batches = make_batches(texts)
+    logger.info(f"Embedding {len(texts)} texts in {len(batches)} batches "
+                f"with up to {max_concurrency} concurrent requests")
+
+    completed = 0
+    resumed = 0
+    pending = {}
+    remaining = iter(batches)
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        while True:
+            # Keep a bounded window of batches in flight so finished vectors never pile up
+            for start, end in remaining:
+                checkpoint_path = _checkpoint_path(checkpoint_dir, texts, start, end, model)
+                future = executor.submit(_embed_with_checkpoint, openai_client, texts, start, end, model, checkpoint_path)
+                pending[future] = (start, end)
+                if len(pending) >= max_concurrency * 2:
+                    break
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                start, end = pending.pop(future)
+                vectors, from_checkpoint = future.result()
+                completed += 1
+                resumed += from_checkpoint
+                logger.info(f"Batch {completed}/{len(batches)} done (rows {start}-{end})"
+                            f"{' from checkpoint' if from_checkpoint else ''}")
+                yield start, end, vectors
+
+    logger.info(f"All {len(batches)} batches embedded ({resumed} resumed from checkpoints)")
+
+def clear_checkpoints(checkpoint_dir=None):
+    """Remove batch checkpoints once their vectors are safely written elsewhere."""
+    checkpoint_dir = checkpoint_dir or CONFIG.EMBEDDING_CHECKPOINT_DIR
+    if not os.path.isdir(checkpoint_dir):
+        return
+    for name in os.listdir(checkpoint_dir):
+        if name.startswith("batch_") and name.endswith(".npy"):
+            os.remove(os.path.join(checkpoint_dir, name))
+    logger.info(f"Cleared embedding checkpoints in {checkpoint_dir}")
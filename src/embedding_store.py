@@ -0,0 +1,146 @@
+import os
+import json
+import struct
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# File layout: magic, format version, header length, JSON header (scalar metadata only),
+# padding, then three 64-byte aligned sections: the row-major (count x dimension) matrix,
+# the int64 product IDs and the fixed-width content hashes, one entry per row.
+MAGIC = b"EMBSTORE"
+FORMAT_VERSION = 2
+_PREAMBLE = struct.Struct("<8sIQ")
+_ALIGNMENT = 64
+SUPPORTED_DTYPES = ("float16", "float32")
+ID_DTYPE = np.dtype("<i8")
+
+def _align(offset):
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+class EmbeddingStore:
+    """Compact embedding matrix with an ID index and metadata header, opened via memory mapping.
+
+    Readers only page in the rows they touch, so opening a store is instant regardless of size.
+    """
+
+    def __init__(self, path, header, vectors, product_ids, content_hashes):
+        self.path = path
+        self.header = header
+        self.vectors = vectors
+        self._product_ids = product_ids
+        self._content_hashes = content_hashes
+        self._row_index = None
+
+    @property
+    def model(self):
+        return self.header['model']
+
+    @property
+    def dimensions(self):
+        """Requested (Matryoshka) size the vectors were embedded with; None means native."""
+        return self.header.get('dimensions')
+
+    @property
+    def dimension(self):
+        return self.header['dimension']
+
+    @property
+    def product_ids(self):
+        """Product ID of each row, as a memory-mapped int64 array."""
+        return self._product_ids
+
+    @property
+    def content_hashes(self):
+        """Content hash of each row, as a memory-mapped array of fixed-width ASCII bytes."""
+        return self._content_hashes
+
+    def __len__(self):
+        return self.header['count']
+
+    def row_of(self, product_id):
+        """Row holding `product_id`'s vector, or None."""
+        if self._row_index is None:
+            self._row_index = {pid: row for row, pid in enumerate(self.product_ids.tolist())}
+        return self._row_index.get(product_id)
+
+    def get(self, product_id):
+        """Vector for `product_id` as float32, or None."""
+        row = self.row_of(product_id)
+        return None if row is None else np.asarray(self.vectors[row], dtype=np.float32)
+
+    def flush(self):
+        if isinstance(self.vectors, np.memmap):
+            self.vectors.flush()
+
+    def close(self):
+        """Release the memory map (required before the file is replaced on some platforms)."""
+        self.flush()
+        self.vectors = self._product_ids = self._content_hashes = None
+
+    @classmethod
+    def open(cls, path, mode='r'):
+        """Open an existing store; `mode='r+'` allows rows to be rewritten in place."""
+        with open(path, 'rb') as f:
+            magic, version, header_length = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not an embedding store")
+            if version != FORMAT_VERSION:
+                raise ValueError(f"{path} uses store format version {version}, expected {FORMAT_VERSION}")
+            header = json.loads(f.read(header_length))
+
+        shape = (header['count'], header['dimension'])
+        vectors = np.memmap(path, dtype=header['dtype'], mode=mode, offset=header['data_offset'], shape=shape)
+        count = header['count']
+        product_ids = np.memmap(path, dtype=ID_DTYPE, mode='r', offset=header['ids_offset'], shape=(count,))
+        content_hashes = np.memmap(path, dtype=f"S{header['hash_width']}", mode='r',
+                                   offset=header['hashes_offset'], shape=(count,))
+        return cls(path, header, vectors, product_ids, content_hashes)
+
+    @classmethod
+    def create(cls, path, model, dimension, product_ids, content_hashes, dimensions=None, dtype="float16"):
+        """Create a store with a zero-filled, writable matrix; fill `store.vectors` and flush."""
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported dtype '{dtype}', expected one of {SUPPORTED_DTYPES}")
+        if len(product_ids) != len(content_hashes):
+            raise ValueError("product_ids and content_hashes must have the same length")
+
+        ids = np.asarray(product_ids, dtype=ID_DTYPE)
+        hashes = np.array([content_hash.encode('ascii') for content_hash in content_hashes], dtype=np.bytes_)
+        hash_width = max(hashes.dtype.itemsize, 1)
+        count = len(ids)
+
+        header = {
+            'model': model,
+            'dimensions': dimensions,
+            'dimension': int(dimension),
+            'dtype': dtype,
+            'count': count,
+            'hash_width': hash_width
+        }
+        # Section offsets depend on the header length, which includes the offsets themselves
+        header.update(data_offset=0, ids_offset=0, hashes_offset=0)
+        while True:
+            header_bytes = json.dumps(header).encode()
+            data_offset = _align(_PREAMBLE.size + len(header_bytes))
+            ids_offset = _align(data_offset + count * header['dimension'] * np.dtype(dtype).itemsize)
+            hashes_offset = _align(ids_offset + count * ID_DTYPE.itemsize)
+            offsets = {'data_offset': data_offset, 'ids_offset': ids_offset, 'hashes_offset': hashes_offset}
+            if all(header[key] == value for key, value in offsets.items()):
+                break
+            header.update(offsets)
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+            f.write(header_bytes)
+            f.truncate(hashes_offset + count * hash_width)
+            f.seek(ids_offset)
+            f.write(ids.tobytes())
+            f.seek(hashes_offset)
+            f.write(hashes.astype(f"S{hash_width}").tobytes())
+
+        logger.debug(f"Created embedding store {path} ({count} x {dimension} {dtype})")
+        return cls.open(path, mode='r+')
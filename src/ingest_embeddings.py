@@ -1,16 +1,24 @@
-from qdrant_client import QdrantClient, models
+from qdrant_client import models
 import pandas as pd
 import numpy as np
-from uuid import uuid4
 import logging
 import os
 import sys
 from datetime import datetime
 import time
+import json
+import hashlib
+import argparse
 
 # Add parent directory to path to import config
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import src.config as CONFIG
+from src.clients import get_qdrant_client
+from src.embedding_pipeline import build_product_text, content_hash
+from src.point_ids import product_point_id
+from src.embedding_store import EmbeddingStore
+from src.sparse_vectors import build_sparse_text, document_sparse_vector
+from src.cache import write_catalog_version
 
 qdrant_url = CONFIG.QDRANT_URL
 qdrant_collection_name = CONFIG.QDRANT_COLLECTION_NAME
@@ -20,71 +28,64 @@ embed_products_log_file = CONFIG.EMBED_PRODUCTS_LOG_FILE
 dataset_path = CONFIG.DATASET_PATH
 embedding_file_path = CONFIG.EMBEDDING_FILE
 
-# Create logs directory if it doesn't exist
-os.makedirs('logs', exist_ok=True)
-
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/ingest_embeddings.log'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
-logger.info("Starting embedding ingestion process")
-logger.info(f"Connecting to Qdrant at: {qdrant_url}")
-
-try:
-    client = QdrantClient(url=qdrant_url, timeout=60.0)
-    logger.info("Successfully connected to Qdrant client")
-except Exception as e:
-    logger.error(f"Failed to connect to Qdrant: {str(e)}")
-    sys.exit(1)
-
-# Load dataset and embeddings
-logger.info(f"Loading dataset from: {dataset_path}")
-logger.info(f"Loading embeddings from: {embedding_file_path}")
-
-try:
-    df = pd.read_json(dataset_path)
-    logger.info(f"Successfully loaded {len(df)} products from dataset")
-
-    vectors = np.load(embedding_file_path)
-    logger.info(f"Successfully loaded embeddings with shape: {vectors.shape}")
-    
-except Exception as e:
-    logger.error(f"Failed to load data: {str(e)}")
-    sys.exit(1)
-
-vector_dimension = vectors.shape[1]
-logger.info(f"Target collection: {qdrant_collection_name}")
-logger.info(f"Vector dimension: {vector_dimension}")
-
-# Create collection (delete existing if present)
-try:
-    if client.collection_exists(qdrant_collection_name):
-        logger.warning(f"Collection '{qdrant_collection_name}' already exists. Deleting...")
-        client.delete_collection(qdrant_collection_name)
-        logger.info(f"Collection '{qdrant_collection_name}' deleted successfully")
-
-    logger.info(f"Creating new collection '{qdrant_collection_name}' with {vector_dimension} dimensions...")
+def build_quantization_config():
+    """Quantization settings for the collection, or None to store plain float32 vectors."""
+    if CONFIG.QDRANT_QUANTIZATION == "scalar":
+        return models.ScalarQuantization(scalar=models.ScalarQuantizationConfig(
+            type=models.ScalarType.INT8,
+            quantile=CONFIG.QDRANT_SCALAR_QUANTILE,
+            always_ram=CONFIG.QDRANT_QUANTIZATION_ALWAYS_RAM
+        ))
+    if CONFIG.QDRANT_QUANTIZATION == "binary":
+        return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(
+            always_ram=CONFIG.QDRANT_QUANTIZATION_ALWAYS_RAM
+        ))
+    if CONFIG.QDRANT_QUANTIZATION is not None:
+        raise ValueError(f"Unknown quantization '{CONFIG.QDRANT_QUANTIZATION}', expected None, 'scalar' or 'binary'")
+    return None
+
+def build_sparse_vectors_config():
+    """Sparse (BM25) vector config for hybrid search, or None for a dense-only collection."""
+    if not CONFIG.HYBRID_SEARCH:
+        return None
+    # The IDF modifier lets Qdrant weight query terms by rarity across the whole collection
+    return {CONFIG.SPARSE_VECTOR_NAME: models.SparseVectorParams(modifier=models.Modifier.IDF)}
+
+def create_collection(client, collection_name, vector_dimension):
+    """Create a collection, polling for it if the create request times out."""
+    logger.info(f"Creating new collection '{collection_name}' with {vector_dimension} dimensions "
+                f"(quantization: {CONFIG.QDRANT_QUANTIZATION}, hybrid: {CONFIG.HYBRID_SEARCH})...")
     try:
         client.create_collection(
-            collection_name=qdrant_collection_name,
-            vectors_config=models.VectorParams(size=vector_dimension, distance=models.Distance.COSINE),
+            collection_name=collection_name,
+            vectors_config=models.VectorParams(
+                size=vector_dimension,
+                distance=models.Distance.COSINE,
+                on_disk=CONFIG.QDRANT_VECTORS_ON_DISK
+            ),
+            sparse_vectors_config=build_sparse_vectors_config(),
+            hnsw_config=models.HnswConfigDiff(
+                m=CONFIG.QDRANT_HNSW_M,
+                ef_construct=CONFIG.QDRANT_HNSW_EF_CONSTRUCT,
+                on_disk=CONFIG.QDRANT_HNSW_ON_DISK
+            ),
+            optimizers_config=models.OptimizersConfigDiff(
+                indexing_threshold=CONFIG.QDRANT_INDEXING_THRESHOLD,
+                default_segment_number=CONFIG.QDRANT_DEFAULT_SEGMENT_NUMBER
+            ),
+            quantization_config=build_quantization_config(),
         )
-        logger.info(f"Collection '{qdrant_collection_name}' created successfully")
+        logger.info(f"Collection '{collection_name}' created successfully")
     except Exception as ce:
         if "timed out" in str(ce).lower():
             logger.error("Timed out while creating collection. Polling for collection availability...")
             start_wait = time.time()
             while time.time() - start_wait < 60:
                 try:
-                    if client.collection_exists(qdrant_collection_name):
-                        logger.info(f"Collection '{qdrant_collection_name}' is now available")
+                    if client.collection_exists(collection_name):
+                        logger.info(f"Collection '{collection_name}' is now available")
                         break
                 except Exception as e:
                     pass # Ignore errors while polling
@@ -93,84 +94,402 @@ try:
                 raise TimeoutError("Timed out waiting for collection to become available")
         else:
             raise
-            
-except Exception as e:
-    logger.error(f"Failed to create collection: {str(e)}")
-    sys.exit(1)  
-
-# Prepare points for insertion
-logger.info(f"Preparing {len(df)} points for insertion")
-points = []
-
-try:
-    start_time = datetime.now()
-    
-    for idx, (_, row) in enumerate(df.iterrows()):
-        point = models.PointStruct(
-            id=str(uuid4()),  # Generate unique ID
-            vector=vectors[idx].tolist(),
-            payload={
-                "product_id": row["id"],
-                "name": row["name"],
-                "category": row["category"],
-                "brand": row["brand"],
-                "price": row["price"],
-                "color": row["color"],
-                "material": row["material"],
-                "size": row["size"],
-                "description": row["description"],
-                "url": row["url"]
-            }
+
+def create_payload_indexes(client, collection_name):
+    """Index the payload fields used by search filters so Qdrant does not scan payloads."""
+    for field_name, schema_type in CONFIG.QDRANT_PAYLOAD_INDEXES.items():
+        client.create_payload_index(
+            collection_name=collection_name,
+            field_name=field_name,
+            field_schema=models.PayloadSchemaType(schema_type),
+            wait=True
+        )
+        logger.info(f"Payload index on '{field_name}' ({schema_type}) is in place")
+
+def get_alias_target(client, alias_name):
+    """Return the collection an alias points to, or None if the alias does not exist."""
+    for alias in client.get_aliases().aliases:
+        if alias.alias_name == alias_name:
+            return alias.collection_name
+    return None
+
+def wait_for_green(client, collection_name, timeout):
+    """Block until the collection has finished indexing (status green)."""
+    start_wait = time.time()
+    while True:
+        status = client.get_collection(collection_name).status
+        if status == models.CollectionStatus.GREEN:
+            logger.info(f"Collection '{collection_name}' is green after {time.time() - start_wait:.1f} seconds")
+            return
+        if status == models.CollectionStatus.RED:
+            raise RuntimeError(f"Collection '{collection_name}' is in red status")
+        if time.time() - start_wait > timeout:
+            raise TimeoutError(f"Collection '{collection_name}' did not reach green status within {timeout} seconds")
+        logger.info(f"Waiting for collection '{collection_name}' to finish indexing (status: {status})...")
+        time.sleep(2)
+
+def swap_alias(client, alias_name, collection_name):
+    """Atomically point `alias_name` at `collection_name`."""
+    operations = []
+    if get_alias_target(client, alias_name) is not None:
+        operations.append(models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=alias_name)))
+    operations.append(models.CreateAliasOperation(
+        create_alias=models.CreateAlias(collection_name=collection_name, alias_name=alias_name)
+    ))
+    client.update_collection_aliases(change_aliases_operations=operations)
+
+def cleanup_old_versions(client, alias_name, current_collection, keep, previous_collection=None):
+    """Delete versioned collections behind `alias_name`, keeping `keep` besides the live one.
+
+    The collection the alias pointed to before the swap is always kept first, so rollback never
+    depends on version names sorting after a leftover failed build.
+    """
+    prefix = f"{alias_name}_v"
+    versions = sorted(
+        (c.name for c in client.get_collections().collections
+         if c.name.startswith(prefix) and c.name != current_collection),
+        reverse=True
+    )
+    if previous_collection in versions:
+        versions.remove(previous_collection)
+        versions.insert(0, previous_collection)
+    for collection_name in versions[keep:]:
+        logger.info(f"Deleting old collection version '{collection_name}'")
+        client.delete_collection(collection_name)
+    return versions[keep:]
+
+def drop_failed_build(client, collection_name):
+    """Delete a blue/green build that never went live, so it is not mistaken for a rollback copy."""
+    try:
+        if client.collection_exists(collection_name):
+            client.delete_collection(collection_name)
+            logger.warning(f"Deleted unfinished collection '{collection_name}'")
+    except Exception as e:
+        logger.error(f"Failed to delete unfinished collection '{collection_name}': {str(e)}")
+
+PAYLOAD_FIELDS = ["name", "category", "brand", "price", "color", "material", "size", "description", "url"]
+
+def build_payload(record):
+    """Point payload for a product record, with hashes used to detect changes on sync."""
+    payload = {"product_id": record["id"]}
+    payload.update({field: record[field] for field in PAYLOAD_FIELDS})
+    payload["content_hash"] = content_hash(build_product_text(record))
+    payload["payload_hash"] = hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:32]
+    return payload
+
+def iter_payloads(df, chunk_size):
+    """Yield point payloads chunk by chunk instead of materializing them all."""
+    for chunk_start in range(0, len(df), chunk_size):
+        chunk = df.iloc[chunk_start:chunk_start + chunk_size]
+        for record in chunk.to_dict('records'):
+            yield build_payload(record)
+
+def iter_point_vectors(vectors, records):
+    """Yield per-point vectors: the unnamed dense vector plus the BM25 sparse vector."""
+    for dense, record in zip(vectors, records):
+        yield {
+            "": np.asarray(dense, dtype=np.float32).tolist(),
+            CONFIG.SPARSE_VECTOR_NAME: document_sparse_vector(build_sparse_text(record))
+        }
+
+def iter_hybrid_vectors(df, vectors, chunk_size):
+    """Stream point vectors chunk by chunk, reading dense rows from the memory map as needed."""
+    for chunk_start in range(0, len(df), chunk_size):
+        records = df.iloc[chunk_start:chunk_start + chunk_size].to_dict('records')
+        yield from iter_point_vectors(vectors[chunk_start:chunk_start + chunk_size], records)
+
+def upload_vectors(df, vectors, chunk_size):
+    """Vectors argument for upload_collection: plain dense rows, or named dense + sparse vectors."""
+    if CONFIG.HYBRID_SEARCH:
+        return iter_hybrid_vectors(df, vectors, chunk_size)
+    return vectors
+
+def iter_ids(product_ids, log_every):
+    """Yield deterministic point IDs, logging streaming progress along the way."""
+    start = time.time()
+    for idx, product_id in enumerate(product_ids):
+        if idx and idx % log_every == 0:
+            elapsed = time.time() - start
+            logger.info(f"Streamed {idx}/{len(product_ids)} points ({idx / elapsed:.0f} points/s)")
+        yield product_point_id(product_id)
+
+def fetch_payload_hashes(client, collection_name):
+    """Map point ID -> payload hash for every point in the collection."""
+    hashes = {}
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name,
+            limit=1000,
+            offset=offset,
+            with_payload=["payload_hash"],
+            with_vectors=False
+        )
+        for point in points:
+            hashes[str(point.id)] = (point.payload or {}).get("payload_hash")
+        if offset is None:
+            return hashes
+
+def sync_collection(client, collection_name, df, vectors):
+    """Upsert new or changed products and delete removed ones. Returns (upserted, deleted)."""
+    existing_hashes = fetch_payload_hashes(client, collection_name)
+    logger.info(f"Collection '{collection_name}' currently holds {len(existing_hashes)} points")
+
+    changed_rows = []
+    changed_records = []
+    changed_payloads = []
+    desired_ids = set()
+    for row, record in enumerate(df.to_dict('records')):
+        point_id = product_point_id(record["id"])
+        desired_ids.add(point_id)
+        payload = build_payload(record)
+        if existing_hashes.get(point_id) != payload["payload_hash"]:
+            changed_rows.append(row)
+            changed_records.append(record)
+            changed_payloads.append(payload)
+    removed_ids = [point_id for point_id in existing_hashes if point_id not in desired_ids]
+    logger.info(f"Sync plan: {len(changed_rows)} points to upsert, {len(removed_ids)} to delete")
+
+    batch_size = CONFIG.INGEST_BATCH_SIZE
+    chunk_size = batch_size * 40
+    for chunk_start in range(0, len(changed_rows), chunk_size):
+        rows = changed_rows[chunk_start:chunk_start + chunk_size]
+        chunk_vectors = vectors[rows]
+        if CONFIG.HYBRID_SEARCH:
+            chunk_vectors = iter_point_vectors(chunk_vectors, changed_records[chunk_start:chunk_start + chunk_size])
+        client.upload_collection(
+            collection_name=collection_name,
+            vectors=chunk_vectors,
+            payload=changed_payloads[chunk_start:chunk_start + chunk_size],
+            ids=[product_point_id(payload["product_id"]) for payload in changed_payloads[chunk_start:chunk_start + chunk_size]],
+            batch_size=batch_size,
+            parallel=CONFIG.INGEST_PARALLEL,
+            max_retries=CONFIG.INGEST_MAX_RETRIES,
+            wait=True
         )
-        points.append(point)
-        
-        # Log progress every 25 items
-        if (idx + 1) % 25 == 0:
-            logger.debug(f"Prepared {idx + 1}/{len(df)} points")
-    
-    preparation_time = (datetime.now() - start_time).total_seconds()
-    logger.info(f"Successfully prepared {len(points)} points in {preparation_time:.2f} seconds")
-    
-except Exception as e:
-    logger.error(f"Failed to prepare points: {str(e)}")
-    sys.exit(1)
-
-# Insert points into Qdrant
-logger.info(f"Starting insertion of {len(points)} points into Qdrant...")
-
-try:
-    start_time = datetime.now()
-    
-    client.upsert(
-        collection_name=qdrant_collection_name,
-        points=points,
-        wait=True  # Wait for the operation to complete
+
+    for chunk_start in range(0, len(removed_ids), 1000):
+        client.delete(
+            collection_name=collection_name,
+            points_selector=models.PointIdsList(points=removed_ids[chunk_start:chunk_start + 1000]),
+            wait=True
+        )
+
+    return len(changed_rows), len(removed_ids)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load product embeddings into Qdrant")
+    parser.add_argument("--mode", choices=["blue_green", "recreate", "sync"], default=CONFIG.INGEST_MODE,
+                        help="blue_green swaps an alias to a freshly built collection; recreate rebuilds in place; "
+                             "sync upserts/deletes only what changed in the live collection")
+    return parser.parse_args()
+
+def setup_logging():
+    # Create logs directory if it doesn't exist
+    os.makedirs('logs', exist_ok=True)
+
+    # Set up logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('logs/ingest_embeddings.log'),
+            logging.StreamHandler()
+        ]
     )
-    
-    end_time = datetime.now()
-    insertion_time = (end_time - start_time).total_seconds()
-    
-    # Verify insertion by checking collection info
-    collection_info = client.get_collection(qdrant_collection_name)
-    points_count = collection_info.points_count
-    
-    logger.info(f"Successfully inserted points into Qdrant")
-    logger.info(f"Insertion took {insertion_time:.2f} seconds")
-    logger.info(f"Collection now contains {points_count} points")
-            
-except Exception as e:
-    logger.error(f"Failed to insert points into Qdrant: {str(e)}")
-    sys.exit(1)
-
-# Final summary
-logger.info("=" * 50)
-logger.info("EMBEDDING INGESTION SUMMARY")
-logger.info("=" * 50)
-logger.info(f"Dataset: {dataset_path}")
-logger.info(f"Embeddings: {embedding_file_path}")
-logger.info(f"Collection: {qdrant_collection_name}")
-logger.info(f"Points ingested: {len(points)}")
-logger.info(f"Vector dimension: {vector_dimension}")
-logger.info(f"Total ingestion time: {insertion_time:.2f} seconds")
-logger.info("Embedding ingestion completed successfully!")
-logger.info("=" * 50)
\ No newline at end of file
+
+def main():
+    # Everything runs here rather than at import time: upload_collection's worker processes
+    # re-import this module, and must not start an ingestion of their own
+    ingest_mode = parse_args().mode
+    setup_logging()
+    logger.info("Starting embedding ingestion process")
+    logger.info(f"Connecting to Qdrant at: {qdrant_url}")
+
+    try:
+        client = get_qdrant_client(qdrant_url)
+        logger.info("Successfully connected to Qdrant client")
+    except Exception as e:
+        logger.error(f"Failed to connect to Qdrant: {str(e)}")
+        sys.exit(1)
+
+    # Load dataset and embeddings
+    logger.info(f"Loading dataset from: {dataset_path}")
+    logger.info(f"Loading embeddings from: {embedding_file_path}")
+
+    try:
+        df = pd.read_json(dataset_path)
+        logger.info(f"Successfully loaded {len(df)} products from dataset")
+
+        # Memory-map the embeddings so batches are paged in as they are uploaded
+        store = EmbeddingStore.open(embedding_file_path)
+        vectors = store.vectors
+        logger.info(f"Successfully opened embeddings with shape: {vectors.shape} ({store.header['dtype']}, model: {store.model})")
+
+    except Exception as e:
+        logger.error(f"Failed to load data: {str(e)}")
+        sys.exit(1)
+
+    if not np.array_equal(store.product_ids, df["id"].to_numpy()):
+        logger.error(f"Embeddings cover {len(store)} products that do not match the {len(df)} products in the dataset; "
+                     f"re-run embed_products.py")
+        sys.exit(1)
+
+    vector_dimension = vectors.shape[1]
+    logger.info(f"Vector dimension: {vector_dimension}")
+
+    if CONFIG.EMBEDDING_DIMENSIONS and vector_dimension != CONFIG.EMBEDDING_DIMENSIONS:
+        logger.error(f"Embeddings have {vector_dimension} dimensions but EMBEDDING_DIMENSIONS is "
+                     f"{CONFIG.EMBEDDING_DIMENSIONS}; re-run embed_products.py")
+        sys.exit(1)
+
+    # Pick the collection to build
+    if ingest_mode == "blue_green":
+        target_collection_name = f"{qdrant_collection_name}_v{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        logger.info(f"Blue/green rebuild: building '{target_collection_name}' behind alias '{qdrant_collection_name}'")
+    elif ingest_mode == "sync":
+        # Sync updates whatever collection search currently reads from
+        target_collection_name = get_alias_target(client, qdrant_collection_name) or qdrant_collection_name
+        logger.info(f"Sync mode: updating '{target_collection_name}' in place")
+    else:
+        target_collection_name = qdrant_collection_name
+        logger.info(f"Recreate mode: rebuilding '{target_collection_name}' in place")
+    logger.info(f"Target collection: {target_collection_name}")
+
+    # Create collection (in recreate mode, delete the existing one first)
+    try:
+        if ingest_mode == "sync":
+            if not client.collection_exists(target_collection_name):
+                raise RuntimeError(f"Collection '{target_collection_name}' does not exist; run a full rebuild first")
+            sparse_vectors = client.get_collection(target_collection_name).config.params.sparse_vectors or {}
+            if CONFIG.HYBRID_SEARCH and CONFIG.SPARSE_VECTOR_NAME not in sparse_vectors:
+                raise RuntimeError(f"Collection '{target_collection_name}' has no '{CONFIG.SPARSE_VECTOR_NAME}' sparse vector "
+                                   f"for hybrid search; run a full rebuild first")
+        else:
+            if ingest_mode == "recreate":
+                if get_alias_target(client, qdrant_collection_name) is not None:
+                    logger.warning(f"'{qdrant_collection_name}' is an alias. Deleting alias...")
+                    client.update_collection_aliases(change_aliases_operations=[
+                        models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=qdrant_collection_name))
+                    ])
+                if client.collection_exists(qdrant_collection_name):
+                    logger.warning(f"Collection '{qdrant_collection_name}' already exists. Deleting...")
+                    client.delete_collection(qdrant_collection_name)
+                    logger.info(f"Collection '{qdrant_collection_name}' deleted successfully")
+
+            create_collection(client, target_collection_name, vector_dimension)
+
+        # Index before uploading so segments are built with the payload indexes; re-creating is a no-op
+        create_payload_indexes(client, target_collection_name)
+
+    except Exception as e:
+        logger.error(f"Failed to create collection: {str(e)}")
+        if ingest_mode == "blue_green":
+            drop_failed_build(client, target_collection_name)
+        sys.exit(1)
+
+    # Stream points into Qdrant in fixed-size batches with parallel workers
+    batch_size = CONFIG.INGEST_BATCH_SIZE
+    parallel = CONFIG.INGEST_PARALLEL
+    logger.info(f"Starting {'incremental sync' if ingest_mode == 'sync' else 'streaming upload'} of {len(df)} products "
+                f"(batch size: {batch_size}, workers: {parallel}, retries: {CONFIG.INGEST_MAX_RETRIES})")
+
+    try:
+        start_time = datetime.now()
+
+        if ingest_mode == "sync":
+            upserted_count, deleted_count = sync_collection(client, target_collection_name, df, vectors)
+        else:
+            # Batches are sliced straight from the memory-mapped array; hybrid points add a sparse vector each
+            client.upload_collection(
+                collection_name=target_collection_name,
+                vectors=upload_vectors(df, vectors, batch_size),
+                payload=iter_payloads(df, batch_size),
+                ids=iter_ids(df["id"].tolist(), batch_size * 20),
+                batch_size=batch_size,
+                parallel=parallel,
+                max_retries=CONFIG.INGEST_MAX_RETRIES,
+                wait=True  # Wait for the operation to complete
+            )
+            upserted_count, deleted_count = len(df), 0
+
+        end_time = datetime.now()
+        insertion_time = (end_time - start_time).total_seconds()
+        throughput = upserted_count / insertion_time if insertion_time > 0 else float('inf')
+
+        # Verify insertion by checking collection info
+        collection_info = client.get_collection(target_collection_name)
+        points_count = collection_info.points_count
+
+        logger.info(f"Successfully upserted {upserted_count} and deleted {deleted_count} points in Qdrant")
+        logger.info(f"Insertion took {insertion_time:.2f} seconds ({throughput:.0f} points/s)")
+        logger.info(f"Collection now contains {points_count} points")
+
+    except Exception as e:
+        logger.error(f"Failed to insert points into Qdrant: {str(e)}")
+        if ingest_mode == "blue_green":
+            drop_failed_build(client, target_collection_name)
+        sys.exit(1)
+
+    # Swap the alias once the new collection is fully indexed
+    if ingest_mode == "blue_green":
+        try:
+            wait_for_green(client, target_collection_name, CONFIG.INGEST_GREEN_TIMEOUT)
+
+            if get_alias_target(client, qdrant_collection_name) is None and client.collection_exists(qdrant_collection_name):
+                # One-time migration from a plain collection: the name must be freed before it can become an alias
+                logger.warning(f"'{qdrant_collection_name}' is a plain collection. Deleting it to replace it with an alias...")
+                client.delete_collection(qdrant_collection_name)
+
+            previous_collection_name = get_alias_target(client, qdrant_collection_name)
+            swap_alias(client, qdrant_collection_name, target_collection_name)
+            logger.info(f"Alias '{qdrant_collection_name}' now points to '{target_collection_name}' "
+                        f"(previously: {previous_collection_name})")
+        except Exception as e:
+            logger.error(f"Failed to swap alias to the new collection: {str(e)}")
+            try:
+                went_live = get_alias_target(client, qdrant_collection_name) == target_collection_name
+            except Exception:
+                went_live = True  # Unknown, so never risk deleting the collection search may be using
+            if not went_live:
+                logger.error("Search still uses the previous collection")
+                drop_failed_build(client, target_collection_name)
+            sys.exit(1)
+
+        try:
+            deleted_versions = cleanup_old_versions(client, qdrant_collection_name, target_collection_name,
+                                                    CONFIG.INGEST_KEEP_VERSIONS, previous_collection_name)
+            logger.info(f"Garbage-collected {len(deleted_versions)} old collection versions")
+        except Exception as e:
+            logger.warning(f"Failed to garbage-collect old collection versions: {str(e)}")
+
+    # Bump the catalog version so cached search results are dropped
+    catalog_version = None
+    if upserted_count or deleted_count:
+        try:
+            catalog_version = write_catalog_version(target_collection_name)
+        except Exception as e:
+            logger.warning(f"Failed to write catalog version, cached search results may be stale for up to "
+                           f"{CONFIG.SEARCH_RESULT_CACHE_TTL} seconds: {str(e)}")
+
+    # Final summary
+    logger.info("=" * 50)
+    logger.info("EMBEDDING INGESTION SUMMARY")
+    logger.info("=" * 50)
+    logger.info(f"Dataset: {dataset_path}")
+    logger.info(f"Embeddings: {embedding_file_path}")
+    logger.info(f"Mode: {ingest_mode}")
+    logger.info(f"Collection: {target_collection_name}")
+    logger.info(f"Search alias: {qdrant_collection_name}" if ingest_mode == "blue_green" else "Search alias: none")
+    logger.info(f"Points upserted: {upserted_count}")
+    logger.info(f"Points deleted: {deleted_count}")
+    logger.info(f"Catalog version: {catalog_version or 'unchanged'}")
+    logger.info(f"Vector dimension: {vector_dimension}")
+    logger.info(f"Hybrid (BM25 sparse) vectors: {'yes' if CONFIG.HYBRID_SEARCH else 'no'}")
+    logger.info(f"Total ingestion time: {insertion_time:.2f} seconds")
+    logger.info(f"Throughput: {throughput:.0f} points/s")
+    logger.info("Embedding ingestion completed successfully!")
+    logger.info("=" * 50)
+
+if __name__ == "__main__":
+    main()
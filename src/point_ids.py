@@ -0,0 +1,8 @@
+import uuid
+
+# Fixed namespace so a product maps to the same point ID on every run and machine
+PRODUCT_POINT_NAMESPACE = uuid.UUID("6f1c2a5e-8d4b-5b7e-9a3f-2c1d0e4b7a91")
+
+def product_point_id(product_id):
+    """Deterministic Qdrant point ID for a catalog product."""
+    return str(uuid.uuid5(PRODUCT_POINT_NAMESPACE, f"product:{product_id}"))
@@ -0,0 +1,105 @@
+from qdrant_client import models
+import numpy as np
+import sys
+import os
+import time
+import logging
+
+# Add parent directory to path to import config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import src.config as CONFIG
+from src.clients import get_qdrant_client
+from src.embedding_store import EmbeddingStore
+
+# Create logs directory if it doesn't exist
+os.makedirs('logs', exist_ok=True)
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler('logs/quantization_report.log'),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+SAMPLE_QUERIES = 50
+TOP_K = 10
+
+def search_configurations():
+    """Search settings to compare against exact (brute-force) search."""
+    hnsw_ef = CONFIG.QDRANT_SEARCH_HNSW_EF
+    return [
+        ("float32 HNSW (quantization ignored)", models.SearchParams(
+            hnsw_ef=hnsw_ef, quantization=models.QuantizationSearchParams(ignore=True))),
+        ("quantized, no rescore", models.SearchParams(
+            hnsw_ef=hnsw_ef, quantization=models.QuantizationSearchParams(rescore=False))),
+        ("quantized, rescore, oversampling 1x", models.SearchParams(
+            hnsw_ef=hnsw_ef, quantization=models.QuantizationSearchParams(rescore=True, oversampling=1.0))),
+        ("quantized, rescore, oversampling 2x", models.SearchParams(
+            hnsw_ef=hnsw_ef, quantization=models.QuantizationSearchParams(rescore=True, oversampling=2.0))),
+        ("quantized, rescore, oversampling 4x", models.SearchParams(
+            hnsw_ef=hnsw_ef, quantization=models.QuantizationSearchParams(rescore=True, oversampling=4.0))),
+    ]
+
+def run_queries(client, collection_name, query_vectors, params):
+    """Run every query with the given params; return result ID sets and latencies in ms."""
+    results = []
+    latencies = []
+    for query_vector in query_vectors:
+        start = time.perf_counter()
+        points = client.query_points(
+            collection_name=collection_name,
+            query=query_vector.tolist(),
+            limit=TOP_K,
+            search_params=params,
+            with_payload=False
+        ).points
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append({point.id for point in points})
+    return results, np.array(latencies)
+
+def main():
+    """Report recall@k and latency of quantized search against exact search."""
+    logger.info("=" * 50)
+    logger.info("QUANTIZATION RECALL VS LATENCY REPORT")
+    logger.info("=" * 50)
+
+    collection_name = CONFIG.QDRANT_COLLECTION_NAME
+    client = get_qdrant_client()
+
+    # Catalog vectors double as realistic queries without any embedding API calls
+    vectors = EmbeddingStore.open(CONFIG.EMBEDDING_FILE).vectors
+    rng = np.random.default_rng(42)
+    sample_rows = rng.choice(vectors.shape[0], size=min(SAMPLE_QUERIES, vectors.shape[0]), replace=False)
+    query_vectors = np.asarray(vectors[np.sort(sample_rows)], dtype=np.float32)
+
+    collection_info = client.get_collection(collection_name)
+    quantization = collection_info.config.quantization_config
+    dimension = vectors.shape[1]
+    points_count = collection_info.points_count or 0
+    logger.info(f"Collection: {collection_name} ({points_count} points, {dimension} dimensions)")
+    logger.info(f"Quantization: {quantization if quantization else 'none (quantized rows match float32)'}")
+    logger.info(f"Queries: {len(query_vectors)}, top_k: {TOP_K}")
+
+    # Approximate vector memory per representation
+    for label, bytes_per_vector in [("float32", dimension * 4), ("int8 scalar", dimension), ("binary", dimension / 8)]:
+        logger.info(f"Vector memory ({label}): {bytes_per_vector:.0f} bytes/vector, "
+                    f"{bytes_per_vector * points_count / (1024*1024):.2f} MB total")
+
+    truth, exact_latencies = run_queries(client, collection_name, query_vectors, models.SearchParams(exact=True))
+    logger.info("-" * 50)
+    logger.info(f"{'exact (ground truth)':<40} recall@{TOP_K}: 1.000  "
+                f"mean: {exact_latencies.mean():.2f} ms  p95: {np.percentile(exact_latencies, 95):.2f} ms")
+
+    for label, params in search_configurations():
+        results, latencies = run_queries(client, collection_name, query_vectors, params)
+        recall = np.mean([len(found & expected) / max(len(expected), 1) for found, expected in zip(results, truth)])
+        logger.info(f"{label:<40} recall@{TOP_K}: {recall:.3f}  "
+                    f"mean: {latencies.mean():.2f} ms  p95: {np.percentile(latencies, 95):.2f} ms")
+    logger.info("=" * 50)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import re
+import logging
+
+from pydantic import BaseModel, Field
+
+import src.config as CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Numbers followed by a percentage or a measurement ("80% wool", "30 inch waist") are not prices
+_NOT_PRICE = r"(?![\d.]|in\b|\s*%|\s*(?:percent|inch|inches|cm|mm|waist|inseam|pockets?|packs?|pieces?|pcs)\b)"
+_NUMBER = rf"\$?\s?(\d+(?:\.\d+)?){_NOT_PRICE}\s*(?:dollars|usd|bucks)?"
+
+# Price phrases, tried in order; each match is removed from the text before the next step
+PRICE_PATTERNS = [
+    (re.compile(rf"\bbetween\s+{_NUMBER}\s*(?:and|to|-)\s*{_NUMBER}"), ('price_min', 'price_max')),
+    (re.compile(rf"\$\s?(\d+(?:\.\d+)?){_NOT_PRICE}\s*(?:-|to)\s*{_NUMBER}"), ('price_min', 'price_max')),
+    (re.compile(rf"(?:\bunder|\bbelow|\bless than|\bcheaper than|\bup to|\bat most|\bmax(?:imum)?|<)\s*{_NUMBER}"), ('price_max',)),
+    (re.compile(rf"(?:\bover|\babove|\bmore than|\bat least|\bmin(?:imum)?|>)\s*{_NUMBER}"), ('price_min',)),
+]
+
+# Extra spellings on top of the lowercased CONFIG.PRODUCT_BRANDS names
+BRAND_ALIASES = {
+    "levis": "Levi's",
+    "levi": "Levi's",
+    "hm": "H&M",
+    "h and m": "H&M",
+}
+
+# Singular forms and common synonyms of CONFIG.PRODUCT_CATEGORIES
+CATEGORY_ALIASES = {
+    "dress": "dresses",
+    "pant": "pants",
+    "trousers": "pants",
+    "jeans": "pants",
+    "chinos": "pants",
+    "shirt": "shirts",
+    "blouse": "shirts",
+    "blouses": "shirts",
+    "sweater": "sweaters",
+    "jumper": "sweaters",
+    "jumpers": "sweaters",
+    "t-shirt": "t-shirts",
+    "tshirt": "t-shirts",
+    "tshirts": "t-shirts",
+    "tee": "t-shirts",
+    "tees": "t-shirts",
+    "skirt": "skirts",
+    "jacket": "jackets",
+    "coat": "jackets",
+    "coats": "jackets",
+}
+
+# Words that signal a follow-up, comparison or open question the agent should handle
+AMBIGUOUS_WORDS = {
+    "it", "that", "this", "those", "these", "them", "one", "ones", "first", "second", "third", "last",
+    "previous", "else", "instead", "similar", "compare", "vs", "versus", "difference", "better", "which",
+    "or", "recommend", "suggest", "outfit", "style", "match", "wear", "how", "why", "what", "should",
+    "can", "could", "would", "hi", "hello", "thanks", "thank", "size", "fit",
+}
+
+# Exclusions ("except Levi's", "not over $100") would otherwise be read as the opposite filter
+NEGATION_PATTERN = re.compile(r"\b(?:not|no|nor|except|excluding|without|but|other than)\b|n't\b")
+
+_WORD_PATTERN = re.compile(r"[a-z0-9]+(?:[-&][a-z0-9]+)*")
+
+class ParsedQuery(BaseModel):
+    """Filters recognized in a shopping request and how sure the parser is about them."""
+    filters: dict = Field(default_factory=dict)
+    confidence: float = 0.0
+    reason: str = ""
+
+def _vocabulary(names, aliases):
+    vocabulary = {name.lower().replace("'", ""): name for name in names}
+    vocabulary.update({alias: name for alias, name in aliases.items() if name in names})
+    return vocabulary
+
+def _match_vocabulary(text, vocabulary):
+    """Canonical names whose spelling occurs in `text` as whole words, and the text without them."""
+    found = []
+    # Longest spellings first so "t-shirt" wins over "shirt"
+    for spelling in sorted(vocabulary, key=len, reverse=True):
+        pattern = rf"(?<![\w&-]){re.escape(spelling)}(?![\w&-])"
+        if re.search(pattern, text):
+            found.append(vocabulary[spelling])
+            text = re.sub(pattern, " ", text)
+    return list(dict.fromkeys(found)), text
+
+def _parse_prices(text):
+    filters = {}
+    for pattern, keys in PRICE_PATTERNS:
+        match = pattern.search(text)
+        if match is None:
+            continue
+        for key, value in zip(keys, match.groups()):
+            if key not in filters:
+                filters[key] = float(value)
+        text = text[:match.start()] + " " + text[match.end():]
+    return filters, text
+
+def parse_query(user_input):
+    """Map brand, category and price phrases onto search filters (QueryFilters fields).
+
+    Confidence is 0 for anything that reads like a follow-up, comparison, exclusion or open question.
+    Otherwise it reflects how much of the request the filters pin down.
+    """
+    text = user_input.lower().replace("’", "'")
+    if "?" in text:
+        return ParsedQuery(reason="question")
+    negation = NEGATION_PATTERN.search(text)
+    if negation:
+        return ParsedQuery(reason=f"negation: '{negation.group(0)}'")
+
+    filters, text = _parse_prices(text)
+    text = text.replace("'", "")
+    brands, text = _match_vocabulary(text, _vocabulary(CONFIG.PRODUCT_BRANDS, BRAND_ALIASES))
+    categories, text = _match_vocabulary(text, _vocabulary(CONFIG.PRODUCT_CATEGORIES, CATEGORY_ALIASES))
+
+    if len(brands) > 1 or len(categories) > 1:
+        return ParsedQuery(reason="several brands or categories")
+    if filters.get('price_min') is not None and filters.get('price_max') is not None \
+            and filters['price_min'] > filters['price_max']:
+        return ParsedQuery(reason="empty price range")
+    if brands:
+        filters['brand'] = brands[0]
+    if categories:
+        filters['category'] = categories[0]
+
+    remaining = _WORD_PATTERN.findall(text)
+    ambiguous = AMBIGUOUS_WORDS.intersection(remaining)
+    if ambiguous:
+        return ParsedQuery(filters=filters, reason=f"ambiguous words: {sorted(ambiguous)}")
+
+    # A number left over after price parsing is a need the filters cannot express ("80% wool")
+    numbers = [word for word in remaining if word[0].isdigit()]
+    if numbers:
+        return ParsedQuery(filters=filters, reason=f"unparsed numbers: {numbers}")
+
+    has_price = 'price_min' in filters or 'price_max' in filters
+    if categories and (brands or has_price):
+        confidence = 1.0
+    elif categories:
+        confidence = 0.8
+    elif brands and has_price:
+        confidence = 0.8
+    elif brands:
+        confidence = 0.6
+    else:
+        return ParsedQuery(filters=filters, reason="no brand or category")
+
+    # Long requests usually carry needs that filters cannot express
+    if len(remaining) > CONFIG.FAST_PATH_MAX_EXTRA_WORDS:
+        confidence -= 0.3
+    return ParsedQuery(filters=filters, confidence=round(confidence, 2), reason="parsed")
@@ -0,0 +1,80 @@
+import atexit
+import asyncio
+import threading
+import logging
+
+from src.clients import get_async_openai_client, get_async_qdrant_client, close_async_clients
+from src.cache import get_embedding_cache, get_search_result_cache, get_product_cache
+from src.semantic_search import get_search_backend
+
+logger = logging.getLogger(__name__)
+
+class AgentRuntime:
+    """Long-lived event loop on a background thread that owns the async clients and caches.
+
+    Every agent run is submitted to the same loop, so pooled HTTP connections stay warm
+    across messages instead of being rebuilt by a fresh `asyncio.run` each time.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name="agent-runtime", daemon=True)
+        self._started = threading.Event()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(self._started.set)
+        self.loop.run_forever()
+
+    @classmethod
+    def start(cls):
+        """Start the loop thread and warm up the clients and caches on it."""
+        runtime = cls()
+        runtime._thread.start()
+        runtime._started.wait()
+        runtime.run(runtime._warm_up())
+        # Runs before the clients module's own atexit hook, while the daemon loop thread is still alive
+        atexit.register(runtime.shutdown)
+        logger.info("Agent runtime started")
+        return runtime
+
+    async def _warm_up(self):
+        # Async clients are per loop, so they must be created on the runtime loop itself
+        get_async_openai_client()
+        get_async_qdrant_client()
+        get_embedding_cache()
+        get_search_result_cache()
+        get_product_cache()
+        get_search_backend()
+
+    def submit(self, coro):
+        """Schedule a coroutine on the runtime loop; returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout=None):
+        """Run a coroutine on the runtime loop and block until it finishes."""
+        return self.submit(coro).result(timeout)
+
+    def stream(self, async_iterator, timeout=None):
+        """Iterate an async iterator on the runtime loop from synchronous code."""
+        try:
+            while True:
+                try:
+                    yield self.run(async_iterator.__anext__(), timeout)
+                except StopAsyncIteration:
+                    break
+        finally:
+            aclose = getattr(async_iterator, 'aclose', None)
+            if aclose is not None:
+                self.run(aclose(), timeout)
+
+    def shutdown(self):
+        """Close the loop's clients and stop the loop thread."""
+        if not self.loop.is_running():
+            return
+        try:
+            self.run(close_async_clients(), timeout=10)
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout=10)
+            logger.info("Agent runtime stopped")
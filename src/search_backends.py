@@ -0,0 +1,362 @@
+import json
+import time
+import asyncio
+import logging
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+import src.config as CONFIG
+from src.embedding_store import EmbeddingStore
+from src.point_ids import product_point_id
+
+logger = logging.getLogger(__name__)
+
+# Same shape as Qdrant's ScoredPoint for the fields search results are built from
+LocalHit = namedtuple('LocalHit', ['id', 'score', 'payload'])
+
+PAYLOAD_FIELDS = ["name", "category", "brand", "price", "color", "material", "size", "description", "url"]
+
+# Rows scored per matrix multiply, bounding the float32 working set
+SCORE_CHUNK_ROWS = 65536
+
+# Above this share of surviving rows a filtered query scans the whole matrix instead
+PREFILTER_MAX_FRACTION = 0.5
+
+class SearchBackend:
+    """Vector search engine behind search_product.
+
+    Backends take a query vector plus the same filters dict as build_filter_conditions
+    (brand, category, price_min, price_max) and return hits with `id`, `score` and `payload`.
+    The raw query text is passed along for backends that also match keywords, and `fields`
+    names the payload fields the caller needs (None means all).
+    """
+
+    name = "base"
+
+    def search(self, query_vector, top_k, score_threshold, filters, query_text=None, fields=None):
+        raise NotImplementedError
+
+    def search_batch(self, query_vectors, filters_list, top_k, score_threshold, query_texts=None, fields=None):
+        query_texts = query_texts or [None] * len(query_vectors)
+        return [
+            self.search(query_vector, top_k, score_threshold, filters, query_text=query_text, fields=fields)
+            for query_vector, filters, query_text in zip(query_vectors, filters_list, query_texts)
+        ]
+
+    async def search_async(self, query_vector, top_k, score_threshold, filters, query_text=None, fields=None):
+        return await asyncio.to_thread(self.search, query_vector, top_k, score_threshold, filters, query_text, fields)
+
+    async def search_batch_async(self, query_vectors, filters_list, top_k, score_threshold, query_texts=None, fields=None):
+        return await asyncio.to_thread(self.search_batch, query_vectors, filters_list, top_k, score_threshold, query_texts, fields)
+
+    def retrieve(self, product_ids):
+        """Fetch products by catalog ID; returns hits (score None) for the IDs that exist."""
+        raise NotImplementedError
+
+    async def retrieve_async(self, product_ids):
+        return await asyncio.to_thread(self.retrieve, product_ids)
+
+class IVFIndex:
+    """Inverted-file index: rows grouped by nearest k-means centroid, probed per query."""
+
+    def __init__(self, vectors, norms, nlist, sample_size=50000, iterations=10, seed=42):
+        rng = np.random.default_rng(seed)
+        count = vectors.shape[0]
+        sample_rows = np.sort(rng.choice(count, size=min(sample_size, count), replace=False))
+        sample = np.asarray(vectors[sample_rows], dtype=np.float32) / norms[sample_rows, None]
+
+        # Spherical k-means on a sample: cosine assignment, re-normalized means
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)]
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for cluster in range(nlist):
+                members = sample[labels == cluster]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    centroids[cluster] = centroid / (np.linalg.norm(centroid) or 1.0)
+                else:
+                    centroids[cluster] = sample[rng.integers(len(sample))]
+        self.centroids = centroids
+
+        labels = np.empty(count, dtype=np.int32)
+        for start in range(0, count, SCORE_CHUNK_ROWS):
+            chunk = np.asarray(vectors[start:start + SCORE_CHUNK_ROWS], dtype=np.float32)
+            labels[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+        self.order = np.argsort(labels, kind='stable')
+        self.offsets = np.searchsorted(labels[self.order], np.arange(nlist + 1))
+
+    def candidates(self, query, nprobe):
+        """Rows in the `nprobe` clusters closest to the (normalized) query."""
+        nprobe = min(nprobe, len(self.centroids))
+        probe = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        rows = np.concatenate([self.order[self.offsets[c]:self.offsets[c + 1]] for c in probe])
+        rows.sort()
+        return rows
+
+class LocalBackend(SearchBackend):
+    """In-process search over the memory-mapped embedding store with vectorized NumPy scoring.
+
+    Small catalogs are searched exactly; from LOCAL_SEARCH_IVF_MIN_ROWS rows an IVF index
+    narrows each query to the closest clusters. Search is dense only; the query text is ignored.
+    """
+
+    name = "local"
+
+    def __init__(self, store_path=None, dataset_path=None):
+        store_path = store_path or CONFIG.EMBEDDING_FILE
+        dataset_path = dataset_path or CONFIG.DATASET_PATH
+        logger.info(f"Loading local search backend from {store_path} and {dataset_path}")
+
+        self.store = EmbeddingStore.open(store_path)
+        self.vectors = self.store.vectors
+        with open(dataset_path, 'r') as f:
+            products = {product['id']: product for product in json.load(f)}
+
+        # Payload columns aligned with the store rows; products missing from the dataset never match
+        self.payloads = []
+        product_ids = self.store.product_ids.tolist()
+        for product_id in product_ids:
+            product = products.get(product_id)
+            if product is None:
+                self.payloads.append(None)
+            else:
+                payload = {"product_id": product_id}
+                payload.update({field: product[field] for field in PAYLOAD_FIELDS})
+                self.payloads.append(payload)
+        self.point_ids = [product_point_id(product_id) for product_id in product_ids]
+        self.available = np.array([payload is not None for payload in self.payloads], dtype=bool)
+
+        # Brand and category have few distinct values, so each gets a precomputed row bitmap
+        self.brand_bitmaps = self._build_bitmaps('brand')
+        self.category_bitmaps = self._build_bitmaps('category')
+        # Sorted price index: a price range becomes one contiguous slice of row numbers
+        prices = np.array([payload['price'] if payload else np.nan for payload in self.payloads], dtype=np.float64)
+        priced_rows = np.flatnonzero(~np.isnan(prices))
+        self.price_order = priced_rows[np.argsort(prices[priced_rows], kind='stable')]
+        self.sorted_prices = prices[self.price_order]
+
+        self.norms = np.empty(len(self.store), dtype=np.float32)
+        for start in range(0, len(self.store), SCORE_CHUNK_ROWS):
+            chunk = np.asarray(self.vectors[start:start + SCORE_CHUNK_ROWS], dtype=np.float32)
+            self.norms[start:start + len(chunk)] = np.linalg.norm(chunk, axis=1)
+        self.norms[self.norms == 0] = 1.0
+
+        self.ivf = None
+        if len(self.store) >= CONFIG.LOCAL_SEARCH_IVF_MIN_ROWS:
+            nlist = CONFIG.LOCAL_SEARCH_IVF_LISTS or int(4 * np.sqrt(len(self.store)))
+            logger.info(f"Building IVF index with {nlist} lists over {len(self.store)} rows")
+            self.ivf = IVFIndex(self.vectors, self.norms, nlist)
+
+        logger.info(f"Local search backend ready: {len(self.store)} vectors, "
+                    f"{'IVF' if self.ivf is not None else 'brute force'} search")
+
+    def _build_bitmaps(self, field):
+        bitmaps = {}
+        for row, payload in enumerate(self.payloads):
+            if payload is None:
+                continue
+            bitmap = bitmaps.get(payload[field])
+            if bitmap is None:
+                bitmap = bitmaps[payload[field]] = np.zeros(len(self.payloads), dtype=bool)
+            bitmap[row] = True
+        return bitmaps
+
+    def _price_mask(self, price_min, price_max):
+        lo = 0 if price_min is None else np.searchsorted(self.sorted_prices, price_min, side='left')
+        hi = len(self.sorted_prices) if price_max is None else np.searchsorted(self.sorted_prices, price_max, side='right')
+        mask = np.zeros(len(self.payloads), dtype=bool)
+        mask[self.price_order[lo:hi]] = True
+        return mask
+
+    def filter_mask(self, filters):
+        """Boolean row mask with the same semantics as build_filter_conditions."""
+        mask = self.available.copy()
+        if not filters:
+            return mask
+        if 'brand' in filters:
+            bitmap = self.brand_bitmaps.get(filters['brand'])
+            if bitmap is None:
+                return np.zeros_like(mask)
+            mask &= bitmap
+        if 'category' in filters:
+            bitmap = self.category_bitmaps.get(filters['category'])
+            if bitmap is None:
+                return np.zeros_like(mask)
+            mask &= bitmap
+        if 'price_min' in filters or 'price_max' in filters:
+            mask &= self._price_mask(filters.get('price_min'), filters.get('price_max'))
+        return mask
+
+    def _score_rows(self, query, rows):
+        """Cosine scores of the given rows against a normalized query."""
+        scores = np.empty(len(rows), dtype=np.float32)
+        for start in range(0, len(rows), SCORE_CHUNK_ROWS):
+            chunk_rows = rows[start:start + SCORE_CHUNK_ROWS]
+            chunk = np.asarray(self.vectors[chunk_rows], dtype=np.float32)
+            scores[start:start + len(chunk_rows)] = (chunk @ query) / self.norms[chunk_rows]
+        return scores
+
+    def _score_all(self, query):
+        scores = np.empty(len(self.store), dtype=np.float32)
+        for start in range(0, len(self.store), SCORE_CHUNK_ROWS):
+            chunk = np.asarray(self.vectors[start:start + SCORE_CHUNK_ROWS], dtype=np.float32)
+            scores[start:start + len(chunk)] = (chunk @ query) / self.norms[start:start + len(chunk)]
+        return scores
+
+    def search(self, query_vector, top_k, score_threshold, filters, query_text=None, fields=None):
+        query = np.asarray(query_vector, dtype=np.float32)
+        if query.shape[0] != self.store.dimension:
+            raise ValueError(
+                f"Local embedding store holds {self.store.dimension}-dimensional vectors but the query is "
+                f"{query.shape[0]}-dimensional; check EMBEDDING_DIMENSIONS or re-run embed_products.py"
+            )
+        query = query / (np.linalg.norm(query) or 1.0)
+        mask = self.filter_mask(filters)
+
+        rows = None
+        if self.ivf is not None:
+            candidates = self.ivf.candidates(query, CONFIG.LOCAL_SEARCH_IVF_NPROBE)
+            rows = candidates[mask[candidates]]
+            if len(rows) < top_k:
+                # Heavy filtering can empty the probed clusters; fall back to exact search
+                rows = None
+
+        if rows is None:
+            rows = np.flatnonzero(mask)
+            if len(rows) > len(mask) * PREFILTER_MAX_FRACTION:
+                # Most rows survive, so a sequential scan beats gathering scattered rows
+                scores = self._score_all(query)
+                scores[~mask] = -np.inf
+                rows = np.arange(len(scores))
+            else:
+                scores = self._score_rows(query, rows)
+        else:
+            scores = self._score_rows(query, rows)
+
+        if score_threshold is not None:
+            keep = scores >= score_threshold
+            rows, scores = rows[keep], scores[keep]
+        else:
+            keep = np.isfinite(scores)
+            rows, scores = rows[keep], scores[keep]
+
+        if len(scores) > top_k:
+            top = np.argpartition(-scores, top_k - 1)[:top_k]
+            rows, scores = rows[top], scores[top]
+        order = np.argsort(-scores, kind='stable')
+        return [
+            LocalHit(id=self.point_ids[row], score=float(score), payload=self.payloads[row])
+            for row, score in zip(rows[order], scores[order])
+        ]
+
+    def retrieve(self, product_ids):
+        hits = []
+        for product_id in product_ids:
+            row = self.store.row_of(product_id)
+            if row is not None and self.payloads[row] is not None:
+                hits.append(LocalHit(id=self.point_ids[row], score=None, payload=self.payloads[row]))
+        return hits
+
+class FallbackResults(list):
+    """Results answered by a fallback backend; callers should not cache them."""
+
+class FallbackBackend(SearchBackend):
+    """Use `primary`, switching to the backend built by `fallback_factory` when it fails.
+
+    After a failure the primary is skipped for `cooldown` seconds, so a hanging server costs
+    one timeout per cooldown rather than one per request; the next request after that probes it again.
+    """
+
+    def __init__(self, primary, fallback_factory, cooldown=None):
+        self.primary = primary
+        self.fallback_factory = fallback_factory
+        self.cooldown = CONFIG.SEARCH_FALLBACK_COOLDOWN if cooldown is None else cooldown
+        self._primary_retry_at = 0.0
+        self._fallback = None
+        self._fallback_lock = threading.Lock()
+        self.name = f"{primary.name}+fallback"
+
+    @property
+    def fallback(self):
+        if self._fallback is None:
+            with self._fallback_lock:
+                if self._fallback is None:
+                    self._fallback = self.fallback_factory()
+        return self._fallback
+
+    async def fallback_async(self):
+        # Building the fallback reads the store and dataset (and may train an IVF index); keep it off the loop
+        if self._fallback is None:
+            return await asyncio.to_thread(lambda: self.fallback)
+        return self._fallback
+
+    def _primary_available(self):
+        return time.monotonic() >= self._primary_retry_at
+
+    def _should_fall_back(self, error):
+        # Dimension mismatches and bad arguments would fail the same way locally
+        if isinstance(error, ValueError):
+            return False
+        self._primary_retry_at = time.monotonic() + self.cooldown
+        logger.warning(f"{self.primary.name} search failed ({type(error).__name__}: {error}), "
+                       f"using local search for the next {self.cooldown} seconds")
+        return True
+
+    def search(self, query_vector, top_k, score_threshold, filters, query_text=None, fields=None):
+        if self._primary_available():
+            try:
+                return self.primary.search(query_vector, top_k, score_threshold, filters, query_text, fields)
+            except Exception as e:
+                if not self._should_fall_back(e):
+                    raise
+        return FallbackResults(self.fallback.search(query_vector, top_k, score_threshold, filters, query_text, fields))
+
+    def search_batch(self, query_vectors, filters_list, top_k, score_threshold, query_texts=None, fields=None):
+        if self._primary_available():
+            try:
+                return self.primary.search_batch(query_vectors, filters_list, top_k, score_threshold, query_texts, fields)
+            except Exception as e:
+                if not self._should_fall_back(e):
+                    raise
+        return FallbackResults(self.fallback.search_batch(query_vectors, filters_list, top_k, score_threshold, query_texts, fields))
+
+    async def search_async(self, query_vector, top_k, score_threshold, filters, query_text=None, fields=None):
+        if self._primary_available():
+            try:
+                return await self.primary.search_async(query_vector, top_k, score_threshold, filters, query_text, fields)
+            except Exception as e:
+                if not self._should_fall_back(e):
+                    raise
+        fallback = await self.fallback_async()
+        return FallbackResults(await fallback.search_async(query_vector, top_k, score_threshold, filters, query_text, fields))
+
+    async def search_batch_async(self, query_vectors, filters_list, top_k, score_threshold, query_texts=None, fields=None):
+        if self._primary_available():
+            try:
+                return await self.primary.search_batch_async(query_vectors, filters_list, top_k, score_threshold, query_texts, fields)
+            except Exception as e:
+                if not self._should_fall_back(e):
+                    raise
+        fallback = await self.fallback_async()
+        return FallbackResults(await fallback.search_batch_async(query_vectors, filters_list, top_k, score_threshold, query_texts, fields))
+
+    def retrieve(self, product_ids):
+        if self._primary_available():
+            try:
+                return self.primary.retrieve(product_ids)
+            except Exception as e:
+                if not self._should_fall_back(e):
+                    raise
+        return FallbackResults(self.fallback.retrieve(product_ids))
+
+    async def retrieve_async(self, product_ids):
+        if self._primary_available():
+            try:
+                return await self.primary.retrieve_async(product_ids)
+            except Exception as e:
+                if not self._should_fall_back(e):
+                    raise
+        fallback = await self.fallback_async()
+        return FallbackResults(await fallback.retrieve_async(product_ids))
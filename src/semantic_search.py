@@ -1,7 +1,8 @@
-from qdrant_client import QdrantClient, models
-import openai
+from qdrant_client import models
 import sys
 import os
+import time
+import threading
 import logging
 from datetime import datetime
 
@@ -22,6 +23,12 @@ logger = logging.getLogger(__name__)
 # Add parent directory to path to import config
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import src.config as CONFIG
+from src.clients import get_qdrant_client, get_openai_client, get_async_qdrant_client, get_async_openai_client
+from src.cache import get_embedding_cache, get_search_result_cache, get_product_cache, normalize_query
+from src.embedding_pipeline import embedding_request_options
+from src.search_backends import SearchBackend, LocalBackend, FallbackBackend, FallbackResults
+from src.sparse_vectors import query_sparse_vector
+from src.point_ids import product_point_id
 
 def build_filter_conditions(filters):
     """Build Qdrant filter conditions from user input."""
@@ -60,99 +67,607 @@ def build_filter_conditions(filters):
     logger.debug(f"Built filter with {len(filter_conditions)} conditions")
     return result
 
-def search_product(query, top_k=5, score_threshold=0.2, filters=None):
-    """Complete search workflow: embed query, search Qdrant, return results."""
+def _missing_texts(queries, vectors):
+    """Texts to embed for the cache misses among `queries`.
+
+    Queries that differ only in case or spacing share a cache entry, so only the first one's
+    original text is sent for embedding.
+    """
+    missing = {}
+    for query, vector in zip(queries, vectors):
+        if vector is None:
+            missing.setdefault(normalize_query(query), query)
+    missing = list(missing.values())
+    logger.info(f"Query embeddings: {len(queries) - len(missing)} cached, {len(missing)} to generate")
+    logger.debug(f"Embedding cache stats: {get_embedding_cache().stats()}")
+    return missing
+
+def _fill_embeddings(queries, vectors, generated):
+    """Fill the gaps in `vectors` from the freshly generated (text, embedding) pairs."""
+    by_key = {normalize_query(text): vector for text, vector in generated}
+    return [
+        vector if vector is not None else by_key[normalize_query(query)]
+        for query, vector in zip(queries, vectors)
+    ]
+
+def embed_queries(queries, openai_client=None):
+    """Embed several queries, sending every cache miss in a single embeddings request."""
+    cache = get_embedding_cache()
+    vectors = [cache.get(query, CONFIG.EMBEDDING_MODEL, CONFIG.EMBEDDING_DIMENSIONS) for query in queries]
+    missing = _missing_texts(queries, vectors)
+    if not missing:
+        return vectors
+
+    embedding_model = CONFIG.EMBEDDING_MODEL
+    logger.info(f"Generating {len(missing)} query embeddings using model: {embedding_model}")
+    openai_client = openai_client or get_openai_client()
+    response = openai_client.embeddings.create(input=missing, model=embedding_model, **embedding_request_options())
+    generated = [(text, item.embedding) for text, item in zip(missing, response.data)]
+    cache.put_many(generated, embedding_model, CONFIG.EMBEDDING_DIMENSIONS)
+    return _fill_embeddings(queries, vectors, generated)
+
+async def embed_queries_async(queries, openai_client=None):
+    """Async variant of embed_queries using the loop's pooled AsyncOpenAI client.
+
+    The cache's SQLite tier is read and written in worker threads, so a miss never blocks the loop on disk I/O.
+    """
+    cache = get_embedding_cache()
+    vectors = await cache.get_many_async(queries, CONFIG.EMBEDDING_MODEL, CONFIG.EMBEDDING_DIMENSIONS)
+    missing = _missing_texts(queries, vectors)
+    if not missing:
+        return vectors
+
+    embedding_model = CONFIG.EMBEDDING_MODEL
+    logger.info(f"Generating {len(missing)} query embeddings using model: {embedding_model}")
+    openai_client = openai_client or get_async_openai_client()
+    response = await openai_client.embeddings.create(input=missing, model=embedding_model, **embedding_request_options())
+    generated = [(text, item.embedding) for text, item in zip(missing, response.data)]
+    await cache.put_many_async(generated, embedding_model, CONFIG.EMBEDDING_DIMENSIONS)
+    return _fill_embeddings(queries, vectors, generated)
+
+def embed_query(query, openai_client=None):
+    """Return the embedding for a query, serving repeats from the embedding cache."""
+    return embed_queries([query], openai_client)[0]
+
+async def embed_query_async(query, openai_client=None):
+    """Async variant of embed_query."""
+    return (await embed_queries_async([query], openai_client))[0]
+
+# Collection name -> (vector size, sparse vector names, time checked), so the guard costs one request per TTL
+_collection_dimensions = {}
+
+def _collection_vector_size(collection_info):
+    vectors = collection_info.config.params.vectors
+    return vectors.size
+
+def _collection_sparse_vectors(collection_info):
+    return set(collection_info.config.params.sparse_vectors or {})
+
+def _verify_dimension(collection_name, dimension, collection_size, sparse_vectors):
+    _collection_dimensions[collection_name] = (collection_size, sparse_vectors, time.time())
+    if collection_size != dimension:
+        raise ValueError(
+            f"Collection '{collection_name}' stores {collection_size}-dimensional vectors but queries are "
+            f"{dimension}-dimensional; check EMBEDDING_DIMENSIONS or re-run embed_products.py and ingest_embeddings.py"
+        )
+
+def _dimension_is_cached(collection_name, dimension):
+    cached = _collection_dimensions.get(collection_name)
+    if cached is None or time.time() - cached[2] > CONFIG.COLLECTION_INFO_TTL:
+        return False
+    _verify_dimension(collection_name, dimension, cached[0], cached[1])
+    return True
+
+def check_collection_dimension(qdrant_client, collection_name, dimension):
+    """Refuse to query a collection whose vector size differs from the query embedding."""
+    if not _dimension_is_cached(collection_name, dimension):
+        collection_info = qdrant_client.get_collection(collection_name)
+        _verify_dimension(collection_name, dimension, _collection_vector_size(collection_info),
+                          _collection_sparse_vectors(collection_info))
+
+async def check_collection_dimension_async(qdrant_client, collection_name, dimension):
+    """Async variant of check_collection_dimension."""
+    if not _dimension_is_cached(collection_name, dimension):
+        collection_info = await qdrant_client.get_collection(collection_name)
+        _verify_dimension(collection_name, dimension, _collection_vector_size(collection_info),
+                          _collection_sparse_vectors(collection_info))
+
+def build_search_params():
+    """Search-time HNSW and quantization parameters from config."""
+    return models.SearchParams(
+        hnsw_ef=CONFIG.QDRANT_SEARCH_HNSW_EF,
+        quantization=models.QuantizationSearchParams(
+            rescore=CONFIG.QDRANT_SEARCH_RESCORE,
+            oversampling=CONFIG.QDRANT_SEARCH_OVERSAMPLING
+        )
+    )
+
+def collection_supports_hybrid(collection_name):
+    """Whether a collection checked by check_collection_dimension has the BM25 sparse vector."""
+    cached = _collection_dimensions.get(collection_name)
+    return cached is not None and CONFIG.SPARSE_VECTOR_NAME in cached[1]
+
+def build_hybrid_query(query_vector, query_text, filter_conditions, top_k, score_threshold):
+    """Dense + sparse prefetches fused with reciprocal rank fusion, or None to search dense only.
+
+    `score_threshold` applies to the dense candidates and HYBRID_SPARSE_MIN_SCORE to the keyword
+    candidates, so weak matches on either side cannot fill the fused top_k. Results carry RRF scores.
+    """
+    if not CONFIG.HYBRID_SEARCH or not query_text:
+        return None
+    sparse_vector = query_sparse_vector(query_text)
+    if sparse_vector is None:
+        return None
+    prefetch_limit = max(CONFIG.HYBRID_PREFETCH_LIMIT, top_k)
+    return {
+        'prefetch': [
+            models.Prefetch(
+                query=query_vector,
+                filter=filter_conditions,
+                limit=prefetch_limit,
+                score_threshold=score_threshold,
+                params=build_search_params()
+            ),
+            models.Prefetch(
+                query=sparse_vector,
+                using=CONFIG.SPARSE_VECTOR_NAME,
+                filter=filter_conditions,
+                limit=prefetch_limit,
+                score_threshold=CONFIG.HYBRID_SPARSE_MIN_SCORE
+            )
+        ],
+        'query': models.FusionQuery(fusion=models.Fusion.RRF)
+    }
+
+def _prepare_filters(filters):
+    """Build filter conditions if provided."""
+    if filters:
+        logger.info(f"Applying filters: {filters}")
+        return build_filter_conditions(filters)
+    logger.info("No filters applied, searching all products")
+    return None
+
+# Payload fields a search result can carry; `fields` arguments select a subset
+RESULT_FIELDS = ('name', 'brand', 'price', 'color', 'size', 'description', 'category', 'material', 'url')
+
+class ProductResult:
+    """One search hit with only the projected payload fields set (others are None).
+
+    Instances are shared with the result cache, so treat them as read-only.
+    """
+
+    __slots__ = ('product_id', 'score', '_fields') + RESULT_FIELDS
+
+    def __init__(self, product_id, score, payload, fields):
+        self.product_id = product_id
+        self.score = score
+        self._fields = fields
+        for field in RESULT_FIELDS:
+            setattr(self, field, payload.get(field) if field in fields else None)
+
+    def __getitem__(self, key):
+        # Dict-style access for callers written against the old result dicts
+        if key not in ('product_id', 'score') and key not in self._fields:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def to_dict(self):
+        """Projected fields only, ready to serialize into the agent context."""
+        result = {'product_id': self.product_id}
+        if self.score is not None:
+            result['score'] = round(self.score, 4)
+        result.update({field: getattr(self, field) for field in self._fields})
+        return result
+
+    def __repr__(self):
+        return f"ProductResult({self.to_dict()!r})"
+
+def resolve_fields(fields):
+    """Validate a field projection; None selects every field."""
+    if fields is None:
+        return RESULT_FIELDS
+    unknown = set(fields) - set(RESULT_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown result fields {sorted(unknown)}, expected a subset of {RESULT_FIELDS}")
+    return tuple(field for field in RESULT_FIELDS if field in fields)
+
+def payload_selector(fields):
+    """`with_payload` include list for the projected fields."""
+    return ['product_id', *fields]
+
+def _process_results(results, fields=RESULT_FIELDS):
+    """Turn scored points into lean ProductResult objects for the AI agent."""
+    logger.info(f"Search completed, found {len(results)} results")
+    if not results:
+        logger.warning("No results found matching the criteria")
+        return []
+
+    logger.debug(f"Top result score: {results[0].score:.4f}")
+    logger.debug(f"Lowest result score: {results[-1].score:.4f}")
+    logger.info(f"Processing {len(results)} results for return")
+    try:
+        processed_results = [
+            ProductResult(result.payload.get('product_id'), result.score, result.payload, fields)
+            for result in results
+        ]
+        
+        logger.info(f"Successfully processed {len(processed_results)} results")
+        logger.debug(f"Sample result: {processed_results[0].name}")
+        
+        return processed_results
+        
+    except Exception as e:
+        logger.error(f"Failed to process search results: {str(e)}")
+        raise
+
+def _process_records(records):
+    """Turn points fetched by ID into ProductResult objects with every field and no score."""
+    return [ProductResult(record.payload['product_id'], None, record.payload, RESULT_FIELDS) for record in records]
+
+class QdrantBackend(SearchBackend):
+    """Searches the Qdrant collection (or alias) named by CONFIG.QDRANT_COLLECTION_NAME.
+
+    Collections ingested with a BM25 sparse vector are searched hybrid (dense + sparse, RRF).
+    """
+
+    name = "qdrant"
+
+    def __init__(self, collection_name=None):
+        self.collection_name = collection_name or CONFIG.QDRANT_COLLECTION_NAME
+
+    def _hybrid_query(self, query_vector, query_text, filter_conditions, top_k, score_threshold):
+        if not collection_supports_hybrid(self.collection_name):
+            return None
+        return build_hybrid_query(query_vector, query_text, filter_conditions, top_k, score_threshold)
+
+    def _query_points_args(self, query_vector, query_text, top_k, score_threshold, filters, fields):
+        filter_conditions = _prepare_filters(filters)
+        with_payload = payload_selector(resolve_fields(fields))
+        hybrid = self._hybrid_query(query_vector, query_text, filter_conditions, top_k, score_threshold)
+        if hybrid is not None:
+            logger.info(f"Hybrid searching collection '{self.collection_name}'")
+            return dict(collection_name=self.collection_name, limit=top_k, with_payload=with_payload, **hybrid)
+
+        logger.info(f"Searching collection '{self.collection_name}'")
+        return dict(
+            collection_name=self.collection_name,
+            query=query_vector,
+            limit=top_k,
+            score_threshold=score_threshold,
+            with_payload=with_payload,
+            query_filter=filter_conditions,
+            search_params=build_search_params()
+        )
+
+    def _build_batch_requests(self, query_vectors, filters_list, top_k, score_threshold, query_texts, fields):
+        """One QueryRequest per query for query_batch_points."""
+        with_payload = payload_selector(resolve_fields(fields))
+        requests = []
+        for query_vector, filters, query_text in zip(query_vectors, filters_list, query_texts):
+            filter_conditions = _prepare_filters(filters)
+            hybrid = self._hybrid_query(query_vector, query_text, filter_conditions, top_k, score_threshold)
+            if hybrid is not None:
+                requests.append(models.QueryRequest(limit=top_k, with_payload=with_payload, **hybrid))
+            else:
+                requests.append(models.QueryRequest(
+                    query=query_vector,
+                    filter=filter_conditions,
+                    limit=top_k,
+                    score_threshold=score_threshold,
+                    with_payload=with_payload,
+                    params=build_search_params()
+                ))
+        return requests
+
+    def search(self, query_vector, top_k, score_threshold, filters, query_text=None, fields=None):
+        qdrant_client = get_qdrant_client()
+
+        # Guard against querying a collection built with a different embedding size
+        check_collection_dimension(qdrant_client, self.collection_name, len(query_vector))
+
+        return qdrant_client.query_points(
+            **self._query_points_args(query_vector, query_text, top_k, score_threshold, filters, fields)
+        ).points
+
+    async def search_async(self, query_vector, top_k, score_threshold, filters, query_text=None, fields=None):
+        qdrant_client = get_async_qdrant_client()
+
+        await check_collection_dimension_async(qdrant_client, self.collection_name, len(query_vector))
+
+        # Query building is pure CPU work, so it is shared with the sync path
+        response = await qdrant_client.query_points(
+            **self._query_points_args(query_vector, query_text, top_k, score_threshold, filters, fields)
+        )
+        return response.points
+
+    def search_batch(self, query_vectors, filters_list, top_k, score_threshold, query_texts=None, fields=None):
+        qdrant_client = get_qdrant_client()
+        check_collection_dimension(qdrant_client, self.collection_name, len(query_vectors[0]))
+
+        logger.info(f"Batch searching collection '{self.collection_name}'")
+        responses = qdrant_client.query_batch_points(
+            collection_name=self.collection_name,
+            requests=self._build_batch_requests(query_vectors, filters_list, top_k, score_threshold,
+                                                query_texts or [None] * len(query_vectors), fields)
+        )
+        return [response.points for response in responses]
+
+    async def search_batch_async(self, query_vectors, filters_list, top_k, score_threshold, query_texts=None, fields=None):
+        qdrant_client = get_async_qdrant_client()
+        await check_collection_dimension_async(qdrant_client, self.collection_name, len(query_vectors[0]))
+
+        logger.info(f"Batch searching collection '{self.collection_name}'")
+        responses = await qdrant_client.query_batch_points(
+            collection_name=self.collection_name,
+            requests=self._build_batch_requests(query_vectors, filters_list, top_k, score_threshold,
+                                                query_texts or [None] * len(query_vectors), fields)
+        )
+        return [response.points for response in responses]
+
+    def _retrieve_args(self, product_ids):
+        logger.info(f"Retrieving {len(product_ids)} products from collection '{self.collection_name}'")
+        return dict(
+            collection_name=self.collection_name,
+            ids=[product_point_id(product_id) for product_id in product_ids],
+            with_payload=payload_selector(RESULT_FIELDS),
+            with_vectors=False
+        )
+
+    def retrieve(self, product_ids):
+        return get_qdrant_client().retrieve(**self._retrieve_args(product_ids))
+
+    async def retrieve_async(self, product_ids):
+        return await get_async_qdrant_client().retrieve(**self._retrieve_args(product_ids))
+
+_search_backend = None
+_search_backend_lock = threading.Lock()
+
+def create_search_backend(kind):
+    """Build the search backend named `kind` ("qdrant", "local" or "auto")."""
+    if kind == "qdrant":
+        return QdrantBackend()
+    if kind == "local":
+        return LocalBackend()
+    if kind == "auto":
+        return FallbackBackend(QdrantBackend(), LocalBackend)
+    raise ValueError(f"Unknown search backend '{kind}', expected 'qdrant', 'local' or 'auto'")
+
+def get_search_backend():
+    """Return the process-wide search backend selected by CONFIG.SEARCH_BACKEND."""
+    global _search_backend
+    if _search_backend is None:
+        with _search_backend_lock:
+            if _search_backend is None:
+                _search_backend = create_search_backend(CONFIG.SEARCH_BACKEND)
+                logger.info(f"Using search backend: {_search_backend.name}")
+    return _search_backend
+
+def _lookup_cached_batch(backend, queries, filters_list, top_k, score_threshold, fields):
+    """Result lists from the cache (None on a miss), their cache keys and the indices still to search."""
+    result_cache = get_search_result_cache()
+    keys = [result_cache.key(backend.name, query, filters, top_k, score_threshold, fields)
+            for query, filters in zip(queries, filters_list)]
+    output = [result_cache.get(key) for key in keys]
+    pending = [idx for idx, results in enumerate(output) if results is None]
+    logger.info(f"Search result cache: {len(queries) - len(pending)} hits, {len(pending)} to search")
+    return keys, output, pending
+
+def _cache_results(result_cache, key, results, processed_results):
+    # Fallback results stand in while the primary backend is down; caching them would keep
+    # serving them after it recovers
+    if isinstance(results, FallbackResults):
+        logger.info("Not caching results from the fallback backend")
+        return
+    result_cache.put(key, processed_results)
+
+def _store_batch_results(keys, output, pending, results, fields):
+    result_cache = get_search_result_cache()
+    for idx, points in zip(pending, results):
+        output[idx] = _process_results(points, fields)
+        _cache_results(result_cache, keys[idx], results, output[idx])
+    return output
+
+def search_product(query, top_k=5, score_threshold=0.2, filters=None, backend=None, fields=None):
+    """Complete search workflow: embed query, search the vector backend, return results.
+
+    Returns ProductResult objects carrying only `fields` (default: all of RESULT_FIELDS).
+    Repeated requests within SEARCH_RESULT_CACHE_TTL are served from the result cache.
+    """
     
     logger.info(f"Starting product search for query: '{query}'")
     logger.info(f"Search parameters - top_k: {top_k}, score_threshold: {score_threshold}")
     
-    qdrant_url = CONFIG.QDRANT_URL
-    openai_api_key = CONFIG.OPENAI_API_KEY
-    collection_name = CONFIG.QDRANT_COLLECTION_NAME
-    embedding_model = CONFIG.EMBEDDING_MODEL
+    backend = backend or get_search_backend()
+    fields = resolve_fields(fields)
+
+    result_cache = get_search_result_cache()
+    cache_key = result_cache.key(backend.name, query, filters, top_k, score_threshold, fields)
+    cached_results = result_cache.get(cache_key)
+    if cached_results is not None:
+        logger.info(f"Serving {len(cached_results)} cached results for '{query}'")
+        return cached_results
+
+    # Get query embedding
+    try:
+        query_vector = embed_query(query)
+        logger.debug(f"Embedding dimension: {len(query_vector)}")
+    except Exception as e:
+        logger.error(f"Failed to generate embedding: {str(e)}")
+        raise
 
-    # Initialize clients
-    logger.debug(f"Initializing clients - Qdrant: {qdrant_url}, Model: {embedding_model}")
+    # Search with optional filters
     try:
-        qdrant_client = QdrantClient(url=qdrant_url)
-        openai_client = openai.Client(api_key=openai_api_key)
-        logger.debug("Successfully initialized Qdrant and OpenAI clients")
+        results = backend.search(query_vector, top_k, score_threshold, filters, query_text=query, fields=fields)
     except Exception as e:
-        logger.error(f"Failed to initialize clients: {str(e)}")
+        logger.error(f"Failed to search {backend.name} backend: {str(e)}")
         raise
+    
+    processed_results = _process_results(results, fields)
+    _cache_results(result_cache, cache_key, results, processed_results)
+    return processed_results
+
+async def search_product_async(query, top_k=5, score_threshold=0.2, filters=None, backend=None, fields=None):
+    """Async search workflow for callers running on an event loop, such as the agent."""
+    
+    logger.info(f"Starting async product search for query: '{query}'")
+    logger.info(f"Search parameters - top_k: {top_k}, score_threshold: {score_threshold}")
+    
+    backend = backend or get_search_backend()
+    fields = resolve_fields(fields)
+
+    result_cache = get_search_result_cache()
+    cache_key = result_cache.key(backend.name, query, filters, top_k, score_threshold, fields)
+    cached_results = result_cache.get(cache_key)
+    if cached_results is not None:
+        logger.info(f"Serving {len(cached_results)} cached results for '{query}'")
+        return cached_results
 
     # Get query embedding
-    logger.info(f"Generating embedding for query using model: {embedding_model}")
     try:
-        response = openai_client.embeddings.create(input=query, model=embedding_model)
-        query_vector = response.data[0].embedding
+        query_vector = await embed_query_async(query)
         logger.debug(f"Embedding dimension: {len(query_vector)}")
     except Exception as e:
         logger.error(f"Failed to generate embedding: {str(e)}")
         raise
-    
-    # Build filter conditions if provided
-    filter_conditions = None
-    if filters:
-        logger.info(f"Applying filters: {filters}")
-        filter_conditions = build_filter_conditions(filters)
-    else:
-        logger.info("No filters applied, searching all products")
 
-    # Search Qdrant with optional filters
-    logger.info(f"Searching collection '{collection_name}'")
+    # Search with optional filters
     try:
-        results = qdrant_client.query_points(
-            collection_name=collection_name,
-            query=query_vector,
-            limit=top_k,
-            score_threshold=score_threshold,
-            with_payload=True,
-            query_filter=filter_conditions
-        ).points
-        
-        logger.info(f"Search completed, found {len(results)} results")
-        
-        if results:
-            logger.debug(f"Top result score: {results[0].score:.4f}")
-            logger.debug(f"Lowest result score: {results[-1].score:.4f}")
-        
+        results = await backend.search_async(query_vector, top_k, score_threshold, filters,
+                                             query_text=query, fields=fields)
     except Exception as e:
-        logger.error(f"Failed to search Qdrant: {str(e)}")
+        logger.error(f"Failed to search {backend.name} backend: {str(e)}")
         raise
     
-    # Return structured data for AI agent
-    if not results:
-        logger.warning("No results found matching the criteria")
+    processed_results = _process_results(results, fields)
+    _cache_results(result_cache, cache_key, results, processed_results)
+    return processed_results
+
+def search_products_batch(queries, filters_list=None, top_k=5, score_threshold=0.2, backend=None, fields=None):
+    """Run several searches with one embeddings request and one batched backend query.
+
+    Returns one result list per query, in the same order as `queries`. Cached requests are
+    answered from the result cache and left out of the batch.
+    """
+    if not queries:
         return []
+    filters_list = filters_list or [None] * len(queries)
+    if len(filters_list) != len(queries):
+        raise ValueError("filters_list must have one entry per query")
+
+    logger.info(f"Starting batch product search for {len(queries)} queries: {queries}")
+    logger.info(f"Search parameters - top_k: {top_k}, score_threshold: {score_threshold}")
     
-    logger.info(f"Processing {len(results)} results for return")
+    backend = backend or get_search_backend()
+
+    fields = resolve_fields(fields)
+    keys, output, pending = _lookup_cached_batch(backend, queries, filters_list, top_k, score_threshold, fields)
+    if not pending:
+        return output
+    pending_queries = [queries[idx] for idx in pending]
+
     try:
-        processed_results = [
-            {
-                'score': result.score,
-                'name': result.payload['name'],
-                'brand': result.payload['brand'],
-                'price': result.payload['price'],
-                'color': result.payload['color'],
-                'size': result.payload['size'],
-                'description': result.payload['description'],
-                'category': result.payload['category'],
-                'material': result.payload['material'],
-                'url': result.payload['url']
-            }
-            for result in results
-        ]
-        
-        logger.info(f"Successfully processed {len(processed_results)} results")
-        logger.debug(f"Sample result: {processed_results[0]['name'] if processed_results else 'None'}")
-        
-        return processed_results
-        
+        query_vectors = embed_queries(pending_queries)
     except Exception as e:
-        logger.error(f"Failed to process search results: {str(e)}")
+        logger.error(f"Failed to generate embeddings: {str(e)}")
+        raise
+
+    try:
+        results = backend.search_batch(query_vectors, [filters_list[idx] for idx in pending], top_k, score_threshold,
+                                       query_texts=pending_queries, fields=fields)
+    except Exception as e:
+        logger.error(f"Failed to batch search {backend.name} backend: {str(e)}")
         raise
 
+    return _store_batch_results(keys, output, pending, results, fields)
+
+async def search_products_batch_async(queries, filters_list=None, top_k=5, score_threshold=0.2, backend=None, fields=None):
+    """Async variant of search_products_batch."""
+    if not queries:
+        return []
+    filters_list = filters_list or [None] * len(queries)
+    if len(filters_list) != len(queries):
+        raise ValueError("filters_list must have one entry per query")
+
+    logger.info(f"Starting async batch product search for {len(queries)} queries: {queries}")
+    logger.info(f"Search parameters - top_k: {top_k}, score_threshold: {score_threshold}")
+    
+    backend = backend or get_search_backend()
+
+    fields = resolve_fields(fields)
+    keys, output, pending = _lookup_cached_batch(backend, queries, filters_list, top_k, score_threshold, fields)
+    if not pending:
+        return output
+    pending_queries = [queries[idx] for idx in pending]
+
+    try:
+        query_vectors = await embed_queries_async(pending_queries)
+    except Exception as e:
+        logger.error(f"Failed to generate embeddings: {str(e)}")
+        raise
+
+    try:
+        results = await backend.search_batch_async(query_vectors, [filters_list[idx] for idx in pending], top_k,
+                                                   score_threshold, query_texts=pending_queries, fields=fields)
+    except Exception as e:
+        logger.error(f"Failed to batch search {backend.name} backend: {str(e)}")
+        raise
+
+    return _store_batch_results(keys, output, pending, results, fields)
+
+def _split_cached_products(backend, product_ids):
+    """Products found in the product cache and the unique IDs that still need a lookup."""
+    product_cache = get_product_cache()
+    products = {}
+    missing = []
+    for product_id in dict.fromkeys(product_ids):
+        product = product_cache.get((backend.name, product_id))
+        if product is None:
+            missing.append(product_id)
+        else:
+            products[product_id] = product
+    logger.info(f"Product lookup: {len(products)} cached, {len(missing)} to retrieve")
+    return products, missing
+
+def _collect_products(backend, product_ids, products, records):
+    product_cache = get_product_cache()
+    for product in _process_records(records):
+        products[product.product_id] = product
+        if not isinstance(records, FallbackResults):
+            product_cache.put((backend.name, product.product_id), product)
+    not_found = [product_id for product_id in product_ids if product_id not in products]
+    if not_found:
+        logger.warning(f"Products not found: {not_found}")
+    return [products[product_id] for product_id in product_ids if product_id in products]
+
+def get_products(product_ids, backend=None):
+    """Fetch full product details by catalog ID with one point lookup, in the order given.
+
+    Unknown IDs are skipped. Products are cached until the catalog version changes.
+    """
+    backend = backend or get_search_backend()
+    products, missing = _split_cached_products(backend, product_ids)
+    records = []
+    if missing:
+        try:
+            records = backend.retrieve(missing)
+        except Exception as e:
+            logger.error(f"Failed to retrieve products from {backend.name} backend: {str(e)}")
+            raise
+    return _collect_products(backend, product_ids, products, records)
+
+async def get_products_async(product_ids, backend=None):
+    """Async variant of get_products."""
+    backend = backend or get_search_backend()
+    products, missing = _split_cached_products(backend, product_ids)
+    records = []
+    if missing:
+        try:
+            records = await backend.retrieve_async(missing)
+        except Exception as e:
+            logger.error(f"Failed to retrieve products from {backend.name} backend: {str(e)}")
+            raise
+    return _collect_products(backend, product_ids, products, records)
+
 def main():
     """Test interface with comprehensive logging."""
     logger.info("=" * 50)
@@ -182,7 +697,7 @@ def main():
         logger.info(f"Total search time: {total_time:.3f} seconds")
         
         for i, result in enumerate(results, 1):
-            logger.info(f"{i}. {result['name']} ({result['brand']}) - ${result['price']} - Score: {result['score']:.3f}")
+            logger.info(f"{i}. {result.name} ({result.brand}) - ${result.price} - Score: {result.score:.3f}")
             
         if not results:
             logger.warning("No products matched the search criteria")
@@ -0,0 +1,95 @@
+import logging
+
+import src.config as CONFIG
+from src.embedding_pipeline import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Products remembered per turn; later ones are rarely referred back to
+MAX_PRODUCTS_PER_TURN = 10
+
+def product_refs(tool_output):
+    """(product_id, name) pairs found in a tool result, e.g. a search result list."""
+    refs = []
+    if isinstance(tool_output, dict):
+        if 'product_id' in tool_output:
+            refs.append((tool_output['product_id'], tool_output.get('name')))
+    elif isinstance(tool_output, (list, tuple)):
+        for item in tool_output:
+            refs.extend(product_refs(item))
+    return refs
+
+def _truncate(text, max_tokens):
+    if count_tokens(text) <= max_tokens:
+        return text
+    # Roughly four characters per token; cut on a word boundary
+    return text[:max_tokens * 4].rsplit(' ', 1)[0] + " …"
+
+class SessionMemory:
+    """Prior chat turns kept as structured agent input items under a token budget.
+
+    Each turn stores the user message, the assistant reply and the products its tool calls
+    returned (IDs and names only, never full tool output). When building the input for a new
+    turn, the newest turns are included in full, older ones shrink to the user message plus
+    product references, and the oldest are dropped once the budget is spent.
+    """
+
+    def __init__(self, max_tokens=None, reply_max_tokens=None):
+        self.max_tokens = max_tokens or CONFIG.SESSION_MEMORY_MAX_TOKENS
+        self.reply_max_tokens = reply_max_tokens or CONFIG.SESSION_MEMORY_REPLY_MAX_TOKENS
+        self.turns = []
+
+    def add_turn(self, user_input, reply, products=()):
+        unique_products = list(dict.fromkeys(products))[:MAX_PRODUCTS_PER_TURN]
+        self.turns.append({'user': user_input, 'reply': reply, 'products': unique_products})
+
+    def clear(self):
+        self.turns = []
+
+    @staticmethod
+    def _products_note(products):
+        if not products:
+            return ""
+        listed = ", ".join(f"#{product_id} {name}" if name else f"#{product_id}" for product_id, name in products)
+        return f"[Products shown (product_id): {listed}]"
+
+    def _turn_items(self, turn, compact):
+        note = self._products_note(turn['products'])
+        if compact:
+            reply = note or "[Reply omitted]"
+        else:
+            reply = "\n".join(part for part in (note, _truncate(turn['reply'], self.reply_max_tokens)) if part)
+        return [
+            {'role': 'user', 'content': turn['user']},
+            {'role': 'assistant', 'content': reply}
+        ]
+
+    @staticmethod
+    def _items_tokens(items):
+        return sum(count_tokens(item['content']) for item in items)
+
+    def build_input(self, user_input):
+        """Agent input items: remembered turns within the token budget, then the new message."""
+        new_message = {'role': 'user', 'content': user_input}
+        budget = self.max_tokens - count_tokens(user_input)
+
+        history = []
+        full_turns = compact_turns = 0
+        for turn in reversed(self.turns):
+            items = self._turn_items(turn, compact=False)
+            tokens = self._items_tokens(items)
+            if compact_turns or tokens > budget:
+                items = self._turn_items(turn, compact=True)
+                tokens = self._items_tokens(items)
+                if tokens > budget:
+                    break
+                compact_turns += 1
+            else:
+                full_turns += 1
+            history[:0] = items
+            budget -= tokens
+
+        dropped = len(self.turns) - full_turns - compact_turns
+        logger.info(f"Session memory: {full_turns} full turns, {compact_turns} compact, {dropped} dropped "
+                    f"({self.max_tokens - budget} of {self.max_tokens} tokens)")
+        return history + [new_message]
@@ -1,10 +1,11 @@
-from agents import Agent, Runner, function_tool
+from agents import Agent, Runner, RunConfig, ModelSettings, OpenAIProvider, ToolExecutionConfig, function_tool
 import sys
 import os
 import logging
 
 from pydantic import BaseModel, Field
-from typing import Literal, Optional
+from typing import AsyncIterator, Literal, Optional
+from openai.types.responses import ResponseTextDeltaEvent
 
 # Create logs directory if it doesn't exist
 os.makedirs('logs', exist_ok=True)
@@ -22,7 +23,15 @@ logger = logging.getLogger(__name__)
 
 # Add parent directory to path to import config
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from src.semantic_search import search_product
+import src.config as CONFIG
+from src.semantic_search import search_product_async, search_products_batch_async, get_products_async
+from src.clients import get_async_openai_client
+from src.session_memory import SessionMemory, product_refs
+from src.query_parser import parse_query
+from src.tool_executor import ToolExecutor
+
+# Runs the tools of one model turn concurrently and coalesces identical in-flight calls
+tool_executor = ToolExecutor()
 
 # Define the input model for query filters
 class QueryFilters(BaseModel):
@@ -31,8 +40,13 @@ class QueryFilters(BaseModel):
     price_min: Optional[float] = Field(None, description="Minimum price filter")
     price_max: Optional[float] = Field(None, description="Maximum price filter")
 
+def result_fields(detailed: bool):
+    """Compact agent view by default; every field, including descriptions, when details are needed."""
+    return None if detailed else CONFIG.AGENT_RESULT_FIELDS
+
 @function_tool
-def search_qdrant(query: str, filters: QueryFilters = QueryFilters(), top_k: int = 5, score_threshold: float = 0.2) -> list:
+@tool_executor.wrap
+async def search_qdrant(query: str, filters: QueryFilters = QueryFilters(), top_k: int = 5, score_threshold: float = 0.2, detailed: bool = False) -> list:
     """
     Search for clothing products based on a natural language query.
     
@@ -40,9 +54,10 @@ def search_qdrant(query: str, filters: QueryFilters = QueryFilters(), top_k: int
         query (str): The search query.
         filters (QueryFilters): Optional filters for brand, category, price range, etc.
         top_k (int): Number of results to return.
-        score_threshold (float): Minimum similarity score to include in results.
+        score_threshold (float): Minimum semantic similarity score; exact keyword matches are ranked in as well.
+        detailed (bool): Include full product descriptions. Prefer get_product_details for products already shown.
     Returns:
-        list: List of matching products with details.
+        list: List of matching products (product_id, name, brand, category, price, color, material, size, url).
     """
     
     logger.info(f"Search request: '{query}' with filters: {filters.model_dump(exclude_none=True)}")
@@ -51,21 +66,76 @@ def search_qdrant(query: str, filters: QueryFilters = QueryFilters(), top_k: int
     filters_dict = filters.model_dump(exclude_none=True)
     
     try:
-        results = search_product(query=query, top_k=top_k, score_threshold=score_threshold, filters=filters_dict)
+        results = await search_product_async(query=query, top_k=top_k, score_threshold=score_threshold, filters=filters_dict,
+                                             fields=result_fields(detailed))
         logger.info(f"Search completed: Found {len(results)} products")
-        return results
+        return [result.to_dict() for result in results]
     except Exception as e:
         logger.error(f"Search failed: {str(e)}")
         raise
 
+class ProductSearch(BaseModel):
+    query: str = Field(..., description="The search query")
+    filters: QueryFilters = Field(default_factory=QueryFilters, description="Optional filters for this query")
+
+@function_tool
+@tool_executor.wrap
+async def search_qdrant_batch(searches: list[ProductSearch], top_k: int = 5, score_threshold: float = 0.2, detailed: bool = False) -> list:
+    """
+    Run several product searches at once, e.g. when comparing options across categories or brands.
+    
+    Args:
+        searches (list[ProductSearch]): The searches to run, each with its own query and filters.
+        top_k (int): Number of results to return per search.
+        score_threshold (float): Minimum semantic similarity score; exact keyword matches are ranked in as well.
+        detailed (bool): Include full product descriptions. Leave off unless the user asks about product details.
+    Returns:
+        list: One list of matching products per search, in the same order as `searches`.
+    """
+    
+    queries = [search.query for search in searches]
+    filters_list = [search.filters.model_dump(exclude_none=True) for search in searches]
+    logger.info(f"Batch search request: {queries} with filters: {filters_list}")
+    
+    try:
+        results = await search_products_batch_async(queries=queries, filters_list=filters_list, top_k=top_k,
+                                                    score_threshold=score_threshold, fields=result_fields(detailed))
+        logger.info(f"Batch search completed: Found {[len(r) for r in results]} products")
+        return [[result.to_dict() for result in search_results] for search_results in results]
+    except Exception as e:
+        logger.error(f"Batch search failed: {str(e)}")
+        raise
+
+@function_tool
+@tool_executor.wrap
+async def get_product_details(product_ids: list[int]) -> list:
+    """
+    Look up products by their product_id, e.g. for follow-up questions about products already shown.
+    
+    Args:
+        product_ids (list[int]): The product_id values from earlier search results.
+    Returns:
+        list: Full details (including description) for each product found, in the same order.
+    """
+    
+    logger.info(f"Product details request: {product_ids}")
+    
+    try:
+        products = await get_products_async(product_ids)
+        logger.info(f"Product details completed: Found {len(products)} of {len(product_ids)} products")
+        return [product.to_dict() for product in products]
+    except Exception as e:
+        logger.error(f"Product details lookup failed: {str(e)}")
+        raise
+
 shopping_agent = Agent(
     name="Shopping Agent",
     instructions="""You are an expert shopping assistant specializing in clothing and fashion. Your role is to help users find the perfect clothing items based on their needs and preferences.
 
 When helping users:
 1. Ask clarifying questions if their request is vague (e.g., occasion, size, budget, style preferences)
-2. Use the search_qdrant tool to find relevant products based on their query
-3. Present results in a friendly, organized manner with key details like price, brand, material, and colors
+2. Use the search_qdrant tool to find relevant products based on their query. When you need several searches at once (e.g. comparing categories or brands), make a single search_qdrant_batch call instead of multiple search_qdrant calls
+3. Present results in a friendly, organized manner with key details like price, brand, material, and colors. Search results leave out product descriptions; when the user asks about features, fit or other details of products already shown, call get_product_details with their product_id values instead of searching again
 4. Provide styling suggestions or alternatives when appropriate
 5. Help users compare different options based on their criteria
 
@@ -73,20 +143,137 @@ Available product categories: dresses, pants, shirts, sweaters, t-shirts, skirts
 Available brands: Zara, Levi's, H&M, Uniqlo, Adidas
 
 Be conversational, helpful, and focus on understanding what the user really wants to achieve with their clothing purchase.""",
-    tools=[search_qdrant],
+    tools=[search_qdrant, search_qdrant_batch, get_product_details],
+    model_settings=ModelSettings(parallel_tool_calls=True),
     tool_use_behavior="run_llm_again"
 )
 
-async def run_agent(user_input: str):
+def build_run_config() -> RunConfig:
+    """Route the agent's model calls through the loop's pooled AsyncOpenAI client.
+
+    The tool concurrency limit applies per run, so concurrent chat sessions do not queue
+    behind each other's tool calls.
+    """
+    return RunConfig(
+        model_provider=OpenAIProvider(openai_client=get_async_openai_client()),
+        tool_execution=ToolExecutionConfig(max_function_tool_concurrency=CONFIG.TOOL_MAX_CONCURRENCY)
+    )
+
+def build_agent_input(user_input: str, memory: Optional[SessionMemory]):
+    """The new message alone, or preceded by the remembered turns of the session."""
+    return memory.build_input(user_input) if memory is not None else user_input
+
+def describe_filters(filters: dict) -> str:
+    """Human-readable summary of search filters, e.g. "Levi's pants under $60"."""
+    parts = [filters.get('brand'), filters.get('category') or "products"]
+    price_min, price_max = filters.get('price_min'), filters.get('price_max')
+    if price_min is not None and price_max is not None:
+        parts.append(f"between ${price_min:g} and ${price_max:g}")
+    elif price_max is not None:
+        parts.append(f"under ${price_max:g}")
+    elif price_min is not None:
+        parts.append(f"over ${price_min:g}")
+    return " ".join(part for part in parts if part)
+
+def render_fast_path_reply(filters: dict, results: list) -> str:
+    """Templated markdown answer listing search results."""
+    lines = [f"Here are {len(results)} {describe_filters(filters)} that match your request:", ""]
+    for i, result in enumerate(results, 1):
+        lines.append(f"{i}. **[{result.name}]({result.url})** by {result.brand} - ${result.price:g}  ")
+        lines.append(f"   {result.color} • {result.material} • Sizes: {', '.join(result.size)}")
+    lines += ["", "Would you like more details on any of these, or should I narrow the search down further?"]
+    return "\n".join(lines)
+
+async def run_fast_path(user_input: str, memory: Optional[SessionMemory] = None) -> Optional[str]:
+    """Answer a simple filter query with one direct search and a template, or return None for the agent.
+
+    Only requests the query parser is confident about take this path, and only when the search finds
+    something; everything else (follow-ups, comparisons, empty results) goes to the LLM agent.
+    """
+    if not CONFIG.FAST_PATH_ENABLED:
+        return None
+    parsed = parse_query(user_input)
+    if parsed.confidence < CONFIG.FAST_PATH_MIN_CONFIDENCE:
+        logger.info(f"Fast path skipped (confidence {parsed.confidence}, {parsed.reason})")
+        return None
+
+    # Validates the parsed values against the same vocabulary the agent's tool uses
+    try:
+        filters_dict = QueryFilters(**parsed.filters).model_dump(exclude_none=True)
+    except ValueError as e:
+        logger.warning(f"Fast path skipped, parsed filters are invalid: {str(e)}")
+        return None
+    logger.info(f"Fast path search: '{user_input}' with filters: {filters_dict}")
+    results = await search_product_async(query=user_input, top_k=CONFIG.FAST_PATH_TOP_K, filters=filters_dict,
+                                         fields=CONFIG.AGENT_RESULT_FIELDS)
+    if not results:
+        logger.info("Fast path found no results, handing over to the agent")
+        return None
+
+    reply = render_fast_path_reply(filters_dict, results)
+    if memory is not None:
+        memory.add_turn(user_input, reply, [(result.product_id, result.name) for result in results])
+    logger.info(f"Fast path answered with {len(results)} products")
+    return reply
+
+async def run_agent(user_input: str, memory: Optional[SessionMemory] = None):
     logger.info(f"Agent conversation started: '{user_input}'")
     try:
-        result = await Runner.run(shopping_agent, user_input)
+        fast_reply = await run_fast_path(user_input, memory)
+        if fast_reply is not None:
+            return fast_reply
+
+        result = await Runner.run(shopping_agent, build_agent_input(user_input, memory), run_config=build_run_config())
         logger.info("Agent conversation completed successfully")
+        if memory is not None:
+            products = [ref for item in result.new_items if item.type == "tool_call_output_item"
+                        for ref in product_refs(item.output)]
+            memory.add_turn(user_input, str(result.final_output), products)
         return result.final_output
     except Exception as e:
         logger.error(f"Agent conversation failed: {str(e)}")
         raise
 
+class AgentStreamEvent(BaseModel):
+    """One incremental update from a streamed agent run."""
+    type: Literal["text_delta", "tool_call", "tool_output", "done"]
+    text: str = ""
+    tool_name: Optional[str] = None
+
+async def run_agent_streamed(user_input: str, memory: Optional[SessionMemory] = None) -> AsyncIterator[AgentStreamEvent]:
+    """Run the agent, yielding text deltas and tool events as they happen, then a final "done" event.
+
+    With `memory`, earlier turns are sent as structured input and this turn is recorded once it completes.
+    """
+    logger.info(f"Streamed agent conversation started: '{user_input}'")
+    try:
+        fast_reply = await run_fast_path(user_input, memory)
+        if fast_reply is not None:
+            yield AgentStreamEvent(type="text_delta", text=fast_reply)
+            yield AgentStreamEvent(type="done", text=fast_reply)
+            return
+
+        products = []
+        result = Runner.run_streamed(shopping_agent, build_agent_input(user_input, memory), run_config=build_run_config())
+        async for event in result.stream_events():
+            if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+                yield AgentStreamEvent(type="text_delta", text=event.data.delta)
+            elif event.type == "run_item_stream_event" and event.name == "tool_called":
+                raw_item = event.item.raw_item
+                yield AgentStreamEvent(type="tool_call", tool_name=getattr(raw_item, 'name', None),
+                                       text=getattr(raw_item, 'arguments', "") or "")
+            elif event.type == "run_item_stream_event" and event.name == "tool_output":
+                products.extend(product_refs(event.item.output))
+                yield AgentStreamEvent(type="tool_output", text=str(event.item.output))
+        logger.info("Streamed agent conversation completed successfully")
+        final_output = str(result.final_output or "")
+        if memory is not None:
+            memory.add_turn(user_input, final_output, products)
+        yield AgentStreamEvent(type="done", text=final_output)
+    except Exception as e:
+        logger.error(f"Streamed agent conversation failed: {str(e)}")
+        raise
+
 if __name__ == "__main__":
     import asyncio
     
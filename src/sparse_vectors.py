@@ -0,0 +1,49 @@
+import re
+import zlib
+from collections import Counter
+
+from qdrant_client import models
+
+import src.config as CONFIG
+
+# Words, numbers and percentages ("501", "100%"); apostrophes are dropped so "Levi's" -> "levis"
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+%?")
+
+# Left out of query vectors: they occur in nearly every product, so a match on them says nothing
+QUERY_STOPWORDS = frozenset({
+    "a", "an", "and", "the", "for", "of", "in", "on", "at", "to", "with", "from", "by", "or", "is", "are",
+    "i", "me", "my", "im", "some", "any", "something", "please", "show", "find", "need", "want", "looking",
+    "like", "would", "get", "good", "nice", "new",
+})
+
+def build_sparse_text(product):
+    """Text indexed for keyword matching: the embedded text plus the exact brand and category."""
+    return (f"{product['name']} {product['brand']} {product['category']} {product['color']} "
+            f"{product['material']} {product['description']}")
+
+def tokenize(text):
+    return _TOKEN_PATTERN.findall(text.lower().replace("'", ""))
+
+def token_id(token):
+    """Stable sparse dimension for a token (no vocabulary file to keep in sync)."""
+    return zlib.crc32(token.encode())
+
+def _to_sparse_vector(weights):
+    indices = sorted(weights)
+    return models.SparseVector(indices=indices, values=[weights[index] for index in indices])
+
+def document_sparse_vector(text):
+    """BM25 term-frequency weights for a document; Qdrant applies IDF at query time."""
+    counts = Counter(token_id(token) for token in tokenize(text))
+    length_norm = 1 - CONFIG.BM25_B + CONFIG.BM25_B * sum(counts.values()) / CONFIG.BM25_AVG_DOC_LENGTH
+    return _to_sparse_vector({
+        index: count * (CONFIG.BM25_K1 + 1) / (count + CONFIG.BM25_K1 * length_norm)
+        for index, count in counts.items()
+    })
+
+def query_sparse_vector(text):
+    """Sparse query vector with unit weight per distinct non-stopword token, or None if there is none."""
+    indices = {token_id(token) for token in tokenize(text) if token not in QUERY_STOPWORDS}
+    if not indices:
+        return None
+    return _to_sparse_vector(dict.fromkeys(indices, 1.0))
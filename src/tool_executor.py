@@ -0,0 +1,71 @@
+import json
+import asyncio
+import inspect
+import logging
+import functools
+import threading
+import weakref
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+def _jsonable(value):
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    return str(value)
+
+class ToolExecutor:
+    """Coalesces duplicate async agent tool calls.
+
+    A call whose tool name and arguments match a call still in flight on the same event loop
+    awaits that call's result instead of sending a second request. How many tool calls of a
+    run execute at once is left to the agent runner (RunConfig.tool_execution).
+    """
+
+    def __init__(self):
+        self.executed = 0
+        self.coalesced = 0
+        # In-flight calls are bound to the loop they were created on
+        self._loop_state = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def _in_flight(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            in_flight = self._loop_state.get(loop)
+            if in_flight is None:
+                in_flight = {}
+                self._loop_state[loop] = in_flight
+        return in_flight
+
+    async def _execute(self, func, args, kwargs):
+        self.executed += 1
+        return await func(*args, **kwargs)
+
+    def wrap(self, func):
+        """Decorate an async tool function; apply before @function_tool so its schema is unchanged."""
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = (func.__name__, json.dumps(bound.arguments, sort_keys=True, default=_jsonable))
+
+            in_flight = self._in_flight()
+            call = in_flight.get(key)
+            if call is not None:
+                self.coalesced += 1
+                logger.info(f"Coalescing duplicate {func.__name__} call with the one in flight")
+            else:
+                call = asyncio.ensure_future(self._execute(func, args, kwargs))
+                in_flight[key] = call
+                call.add_done_callback(lambda _: in_flight.pop(key, None))
+            # Shielded so one cancelled caller does not cancel the call other callers share
+            return await asyncio.shield(call)
+
+        return wrapper
+
+    def stats(self):
+        return {'executed': self.executed, 'coalesced': self.coalesced}
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# src.config refuses to import without an API key; the unit tests never call OpenAI
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,80 @@
+import pytest
+
+from src.query_parser import parse_query
+
+@pytest.mark.parametrize("query, filters", [
+    ("Levi's pants under $60", {'brand': "Levi's", 'category': 'pants', 'price_max': 60.0}),
+    ("shirts below 30 dollars", {'category': 'shirts', 'price_max': 30.0}),
+    ("t-shirts less than 15", {'category': 't-shirts', 'price_max': 15.0}),
+    ("jeans at most $70 from levis", {'brand': "Levi's", 'category': 'pants', 'price_max': 70.0}),
+    ("sweaters at least $80", {'category': 'sweaters', 'price_min': 80.0}),
+    ("skirts over 100", {'category': 'skirts', 'price_min': 100.0}),
+    ("jackets between 50 and 100", {'category': 'jackets', 'price_min': 50.0, 'price_max': 100.0}),
+    ("dresses $20-$40", {'category': 'dresses', 'price_min': 20.0, 'price_max': 40.0}),
+    ("dresses $20 to 40", {'category': 'dresses', 'price_min': 20.0, 'price_max': 40.0}),
+    ("H&M jackets under $49.99", {'brand': 'H&M', 'category': 'jackets', 'price_max': 49.99}),
+])
+def test_price_patterns(query, filters):
+    parsed = parse_query(query)
+    assert parsed.filters == filters
+    assert parsed.confidence == 1.0
+
+@pytest.mark.parametrize("query", [
+    "pants except Levi's",
+    "dresses but not Zara",
+    "jackets not over $100",
+    "shirts without a collar",
+    "skirts excluding H&M",
+    "sweaters other than Uniqlo",
+    "no Adidas t-shirts",
+    "I don't want Zara dresses",
+])
+def test_negation_defers_to_agent(query):
+    parsed = parse_query(query)
+    assert parsed.confidence == 0.0
+    assert parsed.filters == {}
+    assert parsed.reason.startswith("negation")
+
+@pytest.mark.parametrize("query", [
+    "sweaters at least 80% wool",
+    "sweaters at least 80 percent wool",
+    "jeans under 30 inch waist",
+    "jeans under 30in waist",
+    "pants max 3 pockets",
+])
+def test_non_price_numbers_defer_to_agent(query):
+    parsed = parse_query(query)
+    assert 'price_min' not in parsed.filters and 'price_max' not in parsed.filters
+    assert parsed.confidence == 0.0
+    assert parsed.reason.startswith("unparsed numbers")
+
+def test_negation_words_only_match_whole_words():
+    parsed = parse_query("knotted dresses")
+    assert parsed.filters == {'category': 'dresses'}
+    assert parsed.confidence == 0.8
+
+@pytest.mark.parametrize("query, reason", [
+    ("what Zara dresses do you have?", "question"),
+    ("Zara or H&M dresses", "several brands or categories"),
+    ("jackets over $100 under $50", "empty price range"),
+    ("something warm", "no brand or category"),
+])
+def test_unparseable_requests(query, reason):
+    parsed = parse_query(query)
+    assert parsed.confidence == 0.0
+    assert parsed.reason == reason
+
+def test_follow_up_is_ambiguous():
+    parsed = parse_query("show me similar Zara dresses")
+    assert parsed.confidence == 0.0
+    assert parsed.reason.startswith("ambiguous words")
+
+def test_confidence_by_filters():
+    assert parse_query("dresses").confidence == 0.8
+    assert parse_query("Zara under $50").confidence == 0.8
+    assert parse_query("Zara").confidence == 0.6
+
+def test_long_requests_lose_confidence():
+    parsed = parse_query("Zara dresses for a summer wedding on the beach in Italy next month")
+    assert parsed.filters == {'brand': 'Zara', 'category': 'dresses'}
+    assert parsed.confidence == 0.7